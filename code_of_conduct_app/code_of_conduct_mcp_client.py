@@ -2,13 +2,12 @@ from dotenv import load_dotenv
 from mcp import StdioServerParameters, ClientSession
 from mcp.client.stdio import stdio_client
 from langchain_mcp_adapters.resources import load_mcp_resources
-from langchain_ollama import ChatOllama
 import os
 import sys
 import asyncio
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))) # this is not needed when running this file as module. This helps when debugging this file.
-from utils.model_utils import test_model_connection
+from utils.model_utils import get_chat_model, warm_up_model
 
 
 # ------------------------------------------------------------------------
@@ -31,8 +30,8 @@ server_params = StdioServerParameters(
 # ------------------------------------------------------------------------
 # Configure Ollama model
 # ------------------------------------------------------------------------
-model = ChatOllama(
-    model="llama3.1",  # or any other model you have installed
+model = get_chat_model(
+    "llama3.1",  # or any other model you have installed
     temperature=0.7
 )
 
@@ -62,8 +61,8 @@ async def fetch_resource_content():
 # Run mcp client app, fetches and prints the first resource content
 # ------------------------------------------------------------------------
 if __name__ == "__main__":
-    # Test model connectivity
-    if not asyncio.run(test_model_connection(model)):
+    # Test model connectivity, loading the model while at it
+    if not asyncio.run(warm_up_model(model)):
         exit(1)
     
     # Fetch code of conduct from MCP server
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+import httpx
+from a2a.client import Client, ClientConfig, ClientFactory
+from a2a.types import AgentCard
+
+
+# Cached agent cards are used as-is for this long, then revalidated with the agent
+DEFAULT_CARD_TTL_SECONDS = 300
+# Keep-alive connections kept open per agent server
+MAX_KEEPALIVE_CONNECTIONS = 20
+AGENT_TIMEOUT_SECONDS = 30
+
+
+@dataclass
+class CachedCard:
+  card: AgentCard
+  fetched_at: float
+  etag: str | None = None
+
+
+#---------------------------------------------------------------------
+# A2A Client Registry
+#---------------------------------------------------------------------
+class A2AClientRegistry:
+  """Process-wide cache of agent cards and connected A2A clients.
+
+  Creating an httpx client, downloading the agent card and connecting an
+  A2A client for every message costs more requests and connection setups
+  than the message itself. The registry keeps one pooled keep-alive httpx
+  client, and one connected A2A client per agent on top of it, so a routed
+  message costs one request. Cards are revalidated once they are older
+  than card_ttl_seconds, and the agent's client is rebuilt only if its card
+  changed.
+
+  Connections belong to the event loop that opened them, so the HTTP and
+  A2A clients are kept for one loop at a time: called from another loop,
+  the registry starts them over there and closes the previous loop's on
+  that loop. Cards are plain data and outlive the loop.
+  """
+
+  def __init__(self, card_ttl_seconds: float = DEFAULT_CARD_TTL_SECONDS):
+    self.card_ttl_seconds = card_ttl_seconds
+    # agent url -> its card, shared by every loop
+    self.cards: dict[str, CachedCard] = {}
+    self.loop = None
+    self.http_client = None
+    # agent url -> (the card it was connected with, the A2A client)
+    self.clients: dict[str, tuple[AgentCard, Client]] = {}
+    self.lock = None
+
+
+  def _new_http_client(self) -> httpx.AsyncClient:
+    return httpx.AsyncClient(timeout=AGENT_TIMEOUT_SECONDS,
+                             limits=httpx.Limits(max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS))
+
+
+  def _bind_to_running_loop(self):
+    loop = asyncio.get_running_loop()
+    if self.loop is not loop:
+      if self.http_client is not None:
+        self._close_on_its_loop(self.loop, self.http_client)
+      self.loop = loop
+      self.http_client = self._new_http_client()
+      self.clients = {}
+      self.lock = asyncio.Lock()
+
+
+  @staticmethod
+  def _close_on_its_loop(loop, http_client: httpx.AsyncClient):
+    # The clients of a previous loop can't be used, or closed, from this one,
+    # so they are closed on their own loop: now if it runs on another thread,
+    # else once it runs again. A closed loop can't run it any more; its
+    # connections are dropped with the client, so call aclose() before
+    # ending a loop.
+    if loop.is_closed():
+      return
+    if loop.is_running():
+      asyncio.run_coroutine_threadsafe(http_client.aclose(), loop)
+    else:
+      loop.create_task(http_client.aclose())
+
+
+  async def _card(self, agent_url: str) -> AgentCard:
+    cached = self.cards.get(agent_url)
+    if cached and time.monotonic() - cached.fetched_at < self.card_ttl_seconds:
+      return cached.card
+
+    headers = {"If-None-Match": cached.etag} if cached and cached.etag else {}
+    response = await self.http_client.get(f"{agent_url}/.well-known/agent-card.json", headers=headers)
+    if cached and response.status_code == httpx.codes.NOT_MODIFIED:
+      cached.fetched_at = time.monotonic()
+      return cached.card
+    response.raise_for_status()
+    card = AgentCard(**response.json())
+    self.cards[agent_url] = CachedCard(card, time.monotonic(), response.headers.get("ETag"))
+    return card
+
+
+  async def get_card(self, agent_url: str) -> AgentCard:
+    """The agent's card, from the cache while it is fresh."""
+    self._bind_to_running_loop()
+    return await self._card(agent_url)
+
+
+  async def get_client(self, agent_url: str) -> Client:
+    """The connected A2A client for the agent at agent_url, creating it on first use."""
+    self._bind_to_running_loop()
+    # Fetched outside the lock, so one slow agent doesn't hold up messages to the others
+    card = await self._card(agent_url)
+    connected = self.clients.get(agent_url)
+    if connected and connected[0] == card:
+      return connected[1]
+    async with self.lock:
+      # Another message may have connected it meanwhile
+      connected = self.clients.get(agent_url)
+      if connected and connected[0] == card:
+        return connected[1]
+      client = await ClientFactory.connect(agent=card, client_config=ClientConfig(httpx_client=self.http_client))
+      self.clients[agent_url] = (card, client)
+      return client
+
+
+  def invalidate(self, agent_url: str):
+    """Forgets the agent's card and client, e.g. after a failed call, so the next call looks it up again."""
+    self.cards.pop(agent_url, None)
+    self.clients.pop(agent_url, None)
+
+
+  async def aclose(self):
+    """Closes the pooled connections of the running loop; the next call opens new ones."""
+    if self.http_client is not None and self.loop is asyncio.get_running_loop():
+      # The A2A clients send through this client, so closing it closes them all
+      await self.http_client.aclose()
+    self.loop = None
+    self.http_client = None
+    self.clients = {}
@@ -0,0 +1,106 @@
+import sys
+import os
+import asyncio
+import threading
+
+import httpx
+
+
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.log_utils import log_message
+from a2a_client_registry import A2AClientRegistry
+
+
+def agent_card_json(version: str) -> dict:
+  return {
+    "name": "Timeoff Agent",
+    "description": "Performs timeoff operations.",
+    "url": "http://agent.test",
+    "version": version,
+    "defaultInputModes": ["text"],
+    "defaultOutputModes": ["text"],
+    "capabilities": {"streaming": True},
+    "skills": [],
+  }
+
+
+class A2AClientRegistryTest:
+  """Test class for A2AClientRegistry"""
+
+  class MockAgentRegistry(A2AClientRegistry):
+    """Serves the agent card from memory and counts the card requests"""
+
+    def __init__(self, card_ttl_seconds):
+      super().__init__(card_ttl_seconds)
+      self.card_version = "1.0.0"
+      self.card_requests = 0
+
+    def _new_http_client(self):
+      def handler(request):
+        self.card_requests += 1
+        if request.headers.get("If-None-Match") == self.card_version:
+          return httpx.Response(304)
+        return httpx.Response(200, json=agent_card_json(self.card_version), headers={"ETag": self.card_version})
+      return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+  async def test_reuse(self):
+    """Clients should be reused until the card expires, and rebuilt only if it changed"""
+    registry = self.MockAgentRegistry(card_ttl_seconds=0.1)
+    client = await registry.get_client("http://agent.test")
+    assert await registry.get_client("http://agent.test") is client
+    assert registry.card_requests == 1, "Expected the card to be fetched once"
+
+    await asyncio.sleep(0.15)
+    assert await registry.get_client("http://agent.test") is client, "Expected an unchanged card to keep the client"
+    assert registry.card_requests == 2, "Expected the expired card to be revalidated"
+
+    await asyncio.sleep(0.15)
+    registry.card_version = "1.1.0"
+    assert await registry.get_client("http://agent.test") is not client, "Expected a new card to get a new client"
+
+    registry.invalidate("http://agent.test")
+    await registry.get_client("http://agent.test")
+    assert registry.card_requests == 4
+    await registry.aclose()
+    log_message("Test", "✓ Client reuse assertions passed!")
+
+
+  def test_new_loop(self):
+    """A new event loop should get new clients but keep the cached card"""
+    registry = self.MockAgentRegistry(card_ttl_seconds=60)
+    first = asyncio.run(registry.get_client("http://agent.test"))
+    second = asyncio.run(registry.get_client("http://agent.test"))
+    assert first is not second, "Expected clients not to be shared between loops"
+    assert registry.card_requests == 1, "Expected the card to be cached across loops"
+    log_message("Test", "✓ New loop assertions passed!")
+
+
+  def test_previous_loop_closed(self):
+    """Moving to a new loop should close the HTTP client opened on a loop still running elsewhere"""
+    registry = self.MockAgentRegistry(card_ttl_seconds=60)
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+    try:
+      asyncio.run_coroutine_threadsafe(registry.get_client("http://agent.test"), other_loop).result(5)
+      old_http_client = registry.http_client
+
+      asyncio.run(registry.get_client("http://agent.test"))
+      asyncio.run_coroutine_threadsafe(asyncio.sleep(0.1), other_loop).result(5)
+      assert old_http_client.is_closed, "Expected the previous loop's HTTP client to be closed"
+      assert registry.http_client is not old_http_client
+    finally:
+      other_loop.call_soon_threadsafe(other_loop.stop)
+      thread.join()
+      other_loop.close()
+    log_message("Test", "✓ Previous loop assertions passed!")
+
+
+if __name__ == "__main__":
+  # Run the tests
+  test_suite = A2AClientRegistryTest()
+  asyncio.run(test_suite.test_reuse())
+  test_suite.test_new_loop()
+  test_suite.test_previous_loop_closed()
@@ -0,0 +1,104 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+
+
+# Suggested retry delay before any run has finished to estimate from
+DEFAULT_RETRY_AFTER_SECONDS = 5
+# Weight of the latest run in the moving average of run durations
+RUN_SECONDS_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+  """Raised when both the run slots and the wait queue are full."""
+
+  def __init__(self, retry_after_seconds: int):
+    super().__init__(f"Server is busy, retry after {retry_after_seconds} seconds")
+    self.retry_after_seconds = retry_after_seconds
+
+
+#---------------------------------------------------------------------
+# Admission Controller
+#---------------------------------------------------------------------
+class AdmissionController:
+  """Limits how many agent runs execute at once, with a bounded wait queue.
+
+  Up to max_concurrent runs execute; up to max_queued more wait for a slot
+  in arrival order. Anything beyond that is rejected right away with a
+  retry-after hint estimated from recent run durations, instead of piling
+  up more subprocesses and LLM generations on an overloaded box.
+  """
+
+  def __init__(self, max_concurrent: int, max_queued: int):
+    self.max_concurrent = max_concurrent
+    self.max_queued = max_queued
+    self.slots = asyncio.Semaphore(max_concurrent)
+    self.running = 0
+    self.queued = 0
+    self.admitted = 0
+    self.rejected = 0
+    self.total_wait_seconds = 0.0
+    self.max_wait_seconds = 0.0
+    self.avg_run_seconds = None
+
+
+  @classmethod
+  def from_env(cls, prefix: str, default_max_concurrent: int, default_max_queued: int):
+    """Reads the limits from <prefix>_MAX_CONCURRENT and <prefix>_MAX_QUEUED."""
+    return cls(int(os.getenv(f"{prefix}_MAX_CONCURRENT", default_max_concurrent)),
+               int(os.getenv(f"{prefix}_MAX_QUEUED", default_max_queued)))
+
+
+  def retry_after_seconds(self) -> int:
+    if self.avg_run_seconds is None:
+      return DEFAULT_RETRY_AFTER_SECONDS
+    # Time for the runs ahead of a new request to drain through the slots
+    return max(1, math.ceil(self.avg_run_seconds * (self.queued + 1) / self.max_concurrent))
+
+
+  @asynccontextmanager
+  async def admit(self):
+    """Holds a run slot for the body, waiting in the queue if needed; raises AdmissionRejected when full."""
+    if self.running >= self.max_concurrent and self.queued >= self.max_queued:
+      self.rejected += 1
+      raise AdmissionRejected(self.retry_after_seconds())
+
+    self.queued += 1
+    started = time.monotonic()
+    try:
+      await self.slots.acquire()
+    finally:
+      self.queued -= 1
+    waited = time.monotonic() - started
+    self.admitted += 1
+    self.total_wait_seconds += waited
+    self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    self.running += 1
+    run_started = time.monotonic()
+    try:
+      yield
+    finally:
+      self.running -= 1
+      self.slots.release()
+      run_seconds = time.monotonic() - run_started
+      if self.avg_run_seconds is None:
+        self.avg_run_seconds = run_seconds
+      else:
+        self.avg_run_seconds += RUN_SECONDS_SMOOTHING * (run_seconds - self.avg_run_seconds)
+
+
+  def stats(self) -> dict:
+    return {
+      "max_concurrent": self.max_concurrent,
+      "max_queued": self.max_queued,
+      "running": self.running,
+      "queued": self.queued,
+      "admitted": self.admitted,
+      "rejected": self.rejected,
+      "avg_wait_ms": round(self.total_wait_seconds / self.admitted * 1000, 3) if self.admitted else 0.0,
+      "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+      "avg_run_seconds": round(self.avg_run_seconds, 3) if self.avg_run_seconds is not None else None,
+    }
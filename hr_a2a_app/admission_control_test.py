@@ -0,0 +1,74 @@
+import sys
+import os
+import asyncio
+
+
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.log_utils import log_message
+from admission_control import AdmissionController, AdmissionRejected
+
+
+class AdmissionControllerTest:
+  """Test class for AdmissionController"""
+
+  async def test_admission(self):
+    """Runs beyond the slots should queue, and beyond the queue be rejected"""
+    controller = AdmissionController(max_concurrent=2, max_queued=2)
+    release = asyncio.Event()
+    peak_running = 0
+
+    async def agent_run():
+      nonlocal peak_running
+      async with controller.admit():
+        peak_running = max(peak_running, controller.running)
+        await release.wait()
+
+    runs = [asyncio.create_task(agent_run()) for _ in range(4)]
+    await asyncio.sleep(0.05)
+    assert (controller.running, controller.queued) == (2, 2), controller.stats()
+
+    try:
+      async with controller.admit():
+        assert False, "Expected a full controller to reject"
+    except AdmissionRejected as e:
+      assert e.retry_after_seconds >= 1, e.retry_after_seconds
+
+    release.set()
+    await asyncio.gather(*runs)
+    stats = controller.stats()
+    log_message("Test", f"Admission stats: {stats}")
+    assert peak_running == 2, f"Expected at most 2 concurrent runs, got {peak_running}"
+    assert stats["admitted"] == 4 and stats["rejected"] == 1, stats
+    assert stats["running"] == 0 and stats["queued"] == 0, stats
+    assert stats["max_wait_ms"] > 0, "Expected the queued runs to report their wait"
+    log_message("Test", "✓ Admission assertions passed!")
+
+  async def test_cancel_while_queued(self):
+    """A run cancelled while waiting should leave the queue without taking a slot"""
+    controller = AdmissionController(max_concurrent=1, max_queued=1)
+    release = asyncio.Event()
+
+    async def agent_run():
+      async with controller.admit():
+        await release.wait()
+
+    running = asyncio.create_task(agent_run())
+    waiting = asyncio.create_task(agent_run())
+    await asyncio.sleep(0.05)
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    assert controller.queued == 0, controller.stats()
+
+    release.set()
+    await running
+    async with controller.admit():
+      assert controller.running == 1
+    log_message("Test", "✓ Cancel while queued assertions passed!")
+
+
+if __name__ == "__main__":
+  # Run the tests
+  test_suite = AdmissionControllerTest()
+  asyncio.run(test_suite.test_admission())
+  asyncio.run(test_suite.test_cancel_while_queued())
@@ -0,0 +1,100 @@
+import sys
+import os
+import argparse
+import asyncio
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import Callable
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+import uvicorn
+
+# This folder, so the wrapper servers resolve when run as a module
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import hr_policy_a2a_wrapper_server
+import time_off_policy_a2a_wrapper_server
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),'../')))
+from utils.log_utils import log_message
+from utils.model_utils import get_chat_model
+
+
+actor = "HR Agents Host"
+
+HR_POLICY_PORT = 9001
+TIMEOFF_PORT = 9002
+MCP_PORT = int(os.getenv("TIMEOFF_MCP_PORT", "8000"))
+
+
+#---------------------------------------------------------------------
+# Apps
+#---------------------------------------------------------------------
+def build_apps(base_url: Callable[[str], str], with_mcp: bool, mcp_url: str) -> dict:
+  """Builds the agent apps, and the timeoff MCP app if asked, keyed by name.
+
+  Each agent keeps the model settings it has when run on its own, and
+  get_chat_model hands both of them the same HTTP client to Ollama, so they
+  share its connection pool. base_url(name) gives the URL each app is
+  published under.
+  """
+  apps = {
+    # The policy agent answers at temperature 0.7, as in hr_policy_agent
+    "hr-policy": hr_policy_a2a_wrapper_server.build_app(
+      url=base_url("hr-policy"), model=get_chat_model("llama3.1", temperature=0.7)),
+    "timeoff": time_off_policy_a2a_wrapper_server.build_app(
+      url=base_url("timeoff"), mcp_server_url=mcp_url, model=get_chat_model("llama3.1")),
+  }
+  if with_mcp:
+    # Imported only when hosted; the app opens the timeoff database as it starts
+    import time_off_mcp_server
+    apps["mcp"] = time_off_mcp_server.create_app()
+  return apps
+
+
+def build_mounted_app(port: int, with_mcp: bool) -> Starlette:
+  """One app serving every agent under its own path on a single port.
+
+  Starlette doesn't run the lifespans of mounted apps, so the host enters
+  them all itself: the MCP app first, then the agents that talk to it.
+  """
+  # The trailing slash keeps A2A clients posting straight to the mounted app instead of a redirect
+  apps = build_apps(lambda name: f"http://localhost:{port}/{name}/", with_mcp,
+                    f"http://localhost:{port}/mcp/" if with_mcp else f"http://localhost:{MCP_PORT}")
+
+  @asynccontextmanager
+  async def lifespan(app):
+    async with AsyncExitStack() as stack:
+      for name in sorted(apps, key=lambda name: name != "mcp"):
+        await stack.enter_async_context(apps[name].router.lifespan_context(apps[name]))
+      yield
+
+  return Starlette(routes=[Mount(f"/{name}", app=app) for name, app in apps.items()], lifespan=lifespan)
+
+
+#---------------------------------------------------------------------
+# Serving
+#---------------------------------------------------------------------
+async def serve_on_ports(with_mcp: bool, log_level: str):
+  """Serves every app on its usual port, all from this one process and event loop."""
+  ports = {"hr-policy": HR_POLICY_PORT, "timeoff": TIMEOFF_PORT, "mcp": MCP_PORT}
+  apps = build_apps(lambda name: f"http://localhost:{ports[name]}", with_mcp, f"http://localhost:{MCP_PORT}")
+  servers = [uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=ports[name], log_level=log_level))
+             for name, app in apps.items()]
+  await asyncio.gather(*(server.serve() for server in servers))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Hosts the HR agent servers in one process.")
+  parser.add_argument("--port", type=int,
+                      help="Serve every app on this port under /hr-policy/, /timeoff/ and /mcp/ "
+                           "(default: each on its usual port)")
+  parser.add_argument("--with-mcp", action="store_true",
+                      help="Host the timeoff MCP server too, instead of using the one on port 8000")
+  parser.add_argument("--log-level", default="info")
+  args = parser.parse_args()
+
+  if args.port:
+    log_message(actor, f"Serving the HR agents on port {args.port}")
+    uvicorn.run(build_mounted_app(args.port, args.with_mcp), host="0.0.0.0", port=args.port, log_level=args.log_level)
+  else:
+    log_message(actor, f"Serving the HR agents on ports {HR_POLICY_PORT} and {TIMEOFF_PORT}")
+    asyncio.run(serve_on_ports(args.with_mcp, args.log_level))
@@ -0,0 +1,193 @@
+import sys
+import os
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+import uuid
+
+# Every process started from here, and the router in this one, answers with the scripted fake model
+os.environ.setdefault("HR_AGENTS_FAKE_LLM", "1")
+# and the router routes with it too, instead of downloading and running an embeddings model
+os.environ.setdefault("ROUTER_SEMANTIC", "0")
+
+import httpx
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(REPO_ROOT)
+sys.path.append(os.path.join(REPO_ROOT, "time_off_app"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from utils.log_utils import log_message
+from time_off_benchmark import latency_summary, start_mcp_server, wait_for_port
+
+
+actor = "Load Harness"
+
+HR_POLICY_PORT = 9001
+TIMEOFF_PORT = 9002
+MCP_PORT = 8000
+
+# Prompts each hop cycles through; the timeoff ones cover the fast path and the agent path
+HOP_PROMPTS = {
+  "hr_policy": ["What is the policy on remote work?", "How should I handle conflicts with colleagues?"],
+  "timeoff": ["What is my time off balance?", "How many vacation days do I still have left this year?"],
+  "router": ["What is the policy on remote work?", "What is my time off balance?",
+             "Tell me about payroll processing"],
+}
+
+
+#---------------------------------------------------------------------
+# Servers
+#---------------------------------------------------------------------
+def start_agent_server(module: str, port: int) -> subprocess.Popen:
+  """Starts an A2A wrapper server, inheriting the fake model setting; returns the process."""
+  process = subprocess.Popen([sys.executable, "-m", f"hr_a2a_app.{module}"], cwd=REPO_ROOT, env=dict(os.environ),
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+  try:
+    wait_for_port(port, timeout=60)
+  except TimeoutError:
+    process.terminate()
+    raise
+  return process
+
+
+def start_servers() -> list[subprocess.Popen]:
+  processes = [start_mcp_server(":memory:", 1, MCP_PORT)]
+  try:
+    processes.append(start_agent_server("hr_policy_a2a_wrapper_server", HR_POLICY_PORT))
+    processes.append(start_agent_server("time_off_policy_a2a_wrapper_server", TIMEOFF_PORT))
+  except Exception:
+    stop_servers(processes)
+    raise
+  return processes
+
+
+def stop_servers(processes: list[subprocess.Popen]):
+  for process in processes:
+    process.terminate()
+  for process in processes:
+    process.wait()
+
+
+#---------------------------------------------------------------------
+# Hops
+#---------------------------------------------------------------------
+async def send_message(client: httpx.AsyncClient, port: int, prompt: str) -> bool:
+  """One A2A message/send straight to an agent server; True if its task completed."""
+  payload = {
+    "jsonrpc": "2.0",
+    "id": uuid.uuid4().hex,
+    "method": "message/send",
+    "params": {"message": {
+      "role": "user",
+      "messageId": uuid.uuid4().hex,
+      "parts": [{"kind": "text", "text": json.dumps({"user": "Alice", "prompt": prompt})}],
+    }},
+  }
+  response = await client.post(f"http://localhost:{port}/", json=payload)
+  result = response.json().get("result") or {}
+  return result.get("status", {}).get("state") == "completed"
+
+
+async def ask_router(router_agent, prompt: str) -> bool:
+  """One prompt through the router graph, which calls the agent servers over A2A; True if it was answered.
+
+  Routed prompts count only if the agent's task completed, since failed and
+  rejected tasks come back as text too; unsupported ones never leave the router.
+  """
+  from a2a.types import TaskState
+  from langchain_core.messages import HumanMessage
+  response = await router_agent.router_graph.ainvoke({"messages": [HumanMessage(prompt)]})
+  answer = response["messages"][-1]
+  task_state = answer.response_metadata.get("a2a_task_state")
+  if task_state is None:
+    return bool(answer.content)
+  return task_state == TaskState.completed
+
+
+async def run_hop(call, prompts: list[str], requests: int, concurrency: int) -> dict:
+  """Runs `requests` calls from `concurrency` concurrent callers; reports throughput and latency percentiles."""
+  latencies = []
+  errors = 0
+  next_request = iter(range(requests))
+
+  async def caller():
+    nonlocal errors
+    for i in next_request:
+      started = time.perf_counter()
+      try:
+        ok = await call(prompts[i % len(prompts)])
+      except Exception:
+        ok = False
+      if ok:
+        latencies.append(time.perf_counter() - started)
+      else:
+        errors += 1
+
+  started = time.perf_counter()
+  await asyncio.gather(*(caller() for _ in range(concurrency)))
+  return latency_summary(latencies, errors, time.perf_counter() - started)
+
+
+async def run_hops(hops: list[str], requests: int, concurrency: int) -> dict:
+  report = {}
+  async with httpx.AsyncClient(timeout=300, limits=httpx.Limits(max_connections=concurrency * 2)) as client:
+    for hop, port in (("hr_policy", HR_POLICY_PORT), ("timeoff", TIMEOFF_PORT)):
+      if hop in hops:
+        log_message(actor, f"{requests} requests to {hop} on port {port}, {concurrency} at a time")
+        report[hop] = await run_hop(lambda prompt, port=port: send_message(client, port, prompt),
+                                    HOP_PROMPTS[hop], requests, concurrency)
+
+  if "router" in hops:
+    import hr_router_agent
+    router_agent = hr_router_agent.RouterHRAgent(hr_router_agent.model, hr_router_agent.system_prompt,
+                                                 hr_router_agent.user)
+    log_message(actor, f"{requests} requests through the router, {concurrency} at a time")
+    try:
+      report["router"] = await run_hop(lambda prompt: ask_router(router_agent, prompt),
+                                       HOP_PROMPTS["router"], requests, concurrency)
+    finally:
+      await hr_router_agent.a2a_clients.aclose()
+  return report
+
+
+#---------------------------------------------------------------------
+# Main
+#---------------------------------------------------------------------
+def main(argv=None):
+  parser = argparse.ArgumentParser(
+    description="Load test of the router -> A2A -> agent -> MCP chain with a scripted fake LLM.")
+  parser.add_argument("--requests", type=int, default=50, help="Requests per hop")
+  parser.add_argument("--concurrency", type=int, default=8)
+  parser.add_argument("--hops", nargs="+", choices=list(HOP_PROMPTS), default=list(HOP_PROMPTS))
+  parser.add_argument("--llm-latency-ms", type=float, default=0,
+                      help="Time each fake LLM call takes, to stand in for generation")
+  parser.add_argument("--no-servers", action="store_true",
+                      help="Use servers already running, e.g. hr_agents_host, started with HR_AGENTS_FAKE_LLM=1")
+  parser.add_argument("--output", help="Also write the JSON report to this file")
+  args = parser.parse_args(argv)
+
+  # Read by get_chat_model in the servers started below and in the router here
+  os.environ["HR_AGENTS_FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+
+  processes = [] if args.no_servers else start_servers()
+  try:
+    report = {
+      "requests": args.requests,
+      "concurrency": args.concurrency,
+      "llm_latency_ms": args.llm_latency_ms,
+      "hops": asyncio.run(run_hops(args.hops, args.requests, args.concurrency)),
+    }
+  finally:
+    stop_servers(processes)
+
+  output = json.dumps(report, indent=2)
+  print(output)
+  if args.output:
+    with open(args.output, "w") as f:
+      f.write(output + "\n")
+
+
+if __name__ == "__main__":
+  main()
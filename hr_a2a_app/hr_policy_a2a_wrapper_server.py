@@ -1,15 +1,12 @@
 import sys
 import os
 
-from typing_extensions import override
-import json
+import argparse
+from contextlib import asynccontextmanager
 
-from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events import EventQueue
+from a2a.server.agent_execution import RequestContext
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.server.apps import A2AStarletteApplication
-from a2a.utils import new_agent_text_message
 from a2a.types import AgentCard, AgentSkill, AgentCapabilities
 
 # comment below line when you run this code as module with `uv python3 -m hr-a2a-app.hr-policy-a2a-wrapper-server`
@@ -18,43 +15,55 @@ import hr_policy_agent
 # comment below line when you run this code as module with `uv python3 -m hr-a2a-app.hr-policy-a2a-wrapper-server`
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),'../'))) 
 from utils.log_utils import log_message
+from utils.model_utils import start_warm_up
+from utils.metrics import metrics_route
+# This folder too, so task_stores and the uvicorn app factory resolve when run as a module
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from task_stores import task_store_from_env
+from streaming_agent_executor import StreamingAgentExecutor, stats_route
+from admission_control import AdmissionController
 
 
 #---------------------------------------------------------------------
 # HR Policy Agent Executor
 #---------------------------------------------------------------------
-class HRPolicyAgentExecutor(AgentExecutor):
+class HRPolicyAgentExecutor(StreamingAgentExecutor):
   "Executes HR policy agent."
 
-  def __init__(self):
+  def __init__(self, model=None):
+    super().__init__()
     self.actor = "HR Policy Agent Executor"
+    self.model = model or hr_policy_agent.model
+    # Every run starts an MCP server subprocess and an LLM generation, so only a few run at once
+    self.admission = AdmissionController.from_env("HR_POLICY_A2A", default_max_concurrent=2, default_max_queued=8)
     log_message(self.actor, "HR Policy Agent Executor initialized")
-    
 
-  @override
-  async def execute(
-    self,
-    context: RequestContext,
-    event_queue: EventQueue) -> None:
-    
-    user_input = json.loads(context.get_user_input())
-    log_message(self.actor, f"User prompt received: {user_input.get('prompt')}")
-    result = await hr_policy_agent.run_hr_policy_agent(user_input.get('prompt'))
 
-    log_message(self.actor, f"Result received: {result}")
-    await event_queue.enqueue_event(new_agent_text_message(result))
+  @asynccontextmanager
+  async def lifespan(self, app):
+    # Load the model while the server starts, instead of on the first request
+    warm_up = start_warm_up(self.model)
+    yield
+    warm_up.cancel()
     
+
+  def stream_agent(self, context: RequestContext, user_input: dict):
+    return hr_policy_agent.stream_hr_policy_agent(user_input.get('prompt'), self.model)
     
-  async def cancel(
-    self,
-    context: RequestContext, 
-    event_queue: EventQueue) -> None:
     
-    raise Exception("Not implemented")
-
+#---------------------------------------------------------------------
+# ASGI Application
+#---------------------------------------------------------------------
+def build_app(url: str = "http://localhost:9001", model=None):
+  """Builds the A2A server app; called once per uvicorn worker process.
 
-if __name__ == "__main__":
+  url is where clients reach the app, as published in the agent card. model
+  replaces the agent's own chat model, so a host can share one client.
 
+  Set HR_POLICY_A2A_TASK_DB to keep tasks in a SQLite file shared by all
+  workers instead of in process memory. Either way, tasks are dropped after
+  A2A_TASK_TTL_SECONDS or beyond A2A_TASK_MAX_ENTRIES.
+  """
   hr_policy_agent_skill = AgentSkill(
     id="HRPolicySkill",
     name="HR Policy Agent Skills",
@@ -71,7 +80,7 @@ if __name__ == "__main__":
   hr_policy_agent_card = AgentCard(
     name="HR Policy Agent",
     description="Answers question about HR Policies of the organization.",
-    url="http://localhost:9001",
+    url=url,
     version="1.0.0",
     defaultInputModes=["text"],
     defaultOutputModes=["text"],
@@ -79,9 +88,11 @@ if __name__ == "__main__":
     skills=[hr_policy_agent_skill]
   )
 
+  hr_policy_agent_executor = HRPolicyAgentExecutor(model)
+  task_store = task_store_from_env(os.getenv("HR_POLICY_A2A_TASK_DB"))
   hr_policy_request_handler = DefaultRequestHandler(
-    agent_executor=HRPolicyAgentExecutor(),
-    task_store=InMemoryTaskStore(),
+    agent_executor=hr_policy_agent_executor,
+    task_store=task_store,
   )
 
   # Create ASGI Application
@@ -89,11 +100,28 @@ if __name__ == "__main__":
     agent_card=hr_policy_agent_card,
     http_handler=hr_policy_request_handler
   )
+  return hr_policy_server.build(lifespan=hr_policy_agent_executor.lifespan,
+                                routes=[stats_route(hr_policy_agent_executor, task_store), metrics_route()])
+
+
+if __name__ == "__main__":
+
+  parser = argparse.ArgumentParser(description="HR Policy A2A server.")
+  parser.add_argument("--workers", type=int, default=int(os.getenv("HR_POLICY_A2A_WORKERS", "1")),
+                      help="Worker processes serving port 9001 (default: $HR_POLICY_A2A_WORKERS or 1)")
+  args = parser.parse_args()
+
+  # Workers don't share memory, so with more than one the tasks go to a shared file
+  if args.workers > 1:
+    os.environ.setdefault("HR_POLICY_A2A_TASK_DB", "hr_policy_a2a_tasks.db")
 
-  # Start ASGI server that hosts the Starlette application
+  # Start ASGI server that hosts the Starlette application.
+  # uvicorn imports the factory in every worker process it starts.
   import uvicorn
   uvicorn.run(
-    hr_policy_server.build(),
+    "hr_policy_a2a_wrapper_server:build_app",
+    factory=True,
+    workers=args.workers,
     host="0.0.0.0", 
     port=9001, 
     log_level="info")
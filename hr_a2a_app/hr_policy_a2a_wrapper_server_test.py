@@ -8,6 +8,7 @@ import asyncio
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from utils.log_utils import log_message
 from hr_policy_a2a_wrapper_server import HRPolicyAgentExecutor
+from a2a.types import TaskArtifactUpdateEvent, TaskState, TaskStatusUpdateEvent
 
 
 class HRPolicyAgentExecutorTest:
@@ -15,6 +16,11 @@ class HRPolicyAgentExecutorTest:
   
   # Mock classes for testing
   class MockRequestContext:
+    task_id = "test-task-1"
+    context_id = "test-context-1"
+    current_task = None
+    message = None
+
     def get_user_input(self):
       # Return a JSON string with a dummy prompt
       return json.dumps({"prompt": "What is the vacation policy?"})
@@ -43,8 +49,17 @@ class HRPolicyAgentExecutorTest:
     await hr_policy_agent_executor.execute(mock_context, mock_event_queue)
     log_message("Test", "Test execution completed!")
     
-    # Assert expected behavior
-    assert len(mock_event_queue.events) == 1, "Expected 1 event to be enqueued"
+    # Assert expected behavior: submitted, working, streamed tokens, final answer, completed
+    events = mock_event_queue.events
+    assert len(events) >= 4, f"Expected status and artifact updates, got {len(events)} events"
+    assert [event.status.state for event in events[:2]] == [TaskState.submitted, TaskState.working]
+
+    final_artifact, completed = events[-2], events[-1]
+    assert isinstance(final_artifact, TaskArtifactUpdateEvent), "Expected the final answer artifact"
+    assert final_artifact.last_chunk and not final_artifact.append, "Expected the final answer to replace the artifact"
+    assert final_artifact.artifact.parts[0].root.text, "Expected a non-empty answer"
+    assert isinstance(completed, TaskStatusUpdateEvent) and completed.status.state == TaskState.completed
+    assert completed.final, "Expected the completed update to end the stream"
     log_message("Test", "✓ All assertions passed!")
 
 
@@ -5,18 +5,21 @@ from dotenv import load_dotenv
 from typing import TypedDict, Annotated, Any
 import operator
 import asyncio
+import time
 import uuid
 import json
-import httpx
 
-from langchain_ollama import ChatOllama
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, AnyMessage
-from a2a.client import ClientFactory
-from a2a.types import SendMessageRequest, MessageSendParams, AgentCard, Message
+from a2a.types import SendMessageRequest, MessageSendParams, Message, Task, TaskState
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),'../'))) 
 from utils.log_utils import log_message
+from utils.model_utils import get_chat_model, get_embeddings
+from utils.metrics import observe_stage
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from a2a_client_registry import A2AClientRegistry
+from semantic_router import SemanticRouter, card_route_texts
 
 load_dotenv()
 
@@ -27,8 +30,8 @@ actor = "Router Agent"
 
 
 # chat wrapper is suitable for interacting with model by assigning it a role and make it tool call aware
-model = ChatOllama(
-    model="llama3.1",  # or any other model you have installed
+model = get_chat_model(
+    "llama3.1",  # or any other model you have installed
     temperature=0.7)
 
 # ---------------------------------------------------------------
@@ -45,6 +48,16 @@ system_prompt = """
 
 user = "Alice"
 
+# Where the agent servers are; override them when the agents run under one host, see hr_agents_host
+hr_policy_agent_url = os.getenv("HR_POLICY_AGENT_URL", "http://localhost:9001")
+timeoff_agent_url = os.getenv("TIMEOFF_AGENT_URL", "http://localhost:9002")
+
+# Route clear-cut queries by embedding similarity to the agents' skills, and only ask the LLM
+# about the rest; set ROUTER_SEMANTIC=0 to always ask the LLM. Thresholds: see SemanticRouter
+semantic_routing = os.getenv("ROUTER_SEMANTIC", "1") != "0"
+# After failing to build the semantic router, e.g. with an agent down, route with the LLM this long before retrying
+SEMANTIC_ROUTER_RETRY_SECONDS = 30
+
 # ---------------------------------------------------------------
 # Router Graph configuration
 # ---------------------------------------------------------------
@@ -53,48 +66,59 @@ router_graph_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
 # ---------------------------------------------------------------
 # Helper method to invoke remote agent through agent wrapper
 # ---------------------------------------------------------------
-async def execute_a2a_agent(agent_card_url: str, user: str, prompt: str) -> str:
-    
-    # create http client  
-    async with httpx.AsyncClient(timeout=30) as httpx_client:
-        
-      # create agent card from URL
-      agent_card_response = await httpx_client.get(f"{agent_card_url}/.well-known/agent-card.json")
-      agent_card_response.raise_for_status()
-      agent_card = AgentCard(**agent_card_response.json()) 
-      
-      # create agent client with agent card
-      from a2a.client import ClientConfig
-      # instead of connecting to agent, the efficient way would be creating client object and using it to send message.
-      agent_client = await ClientFactory.connect(
-          agent=agent_card,
-          client_config=ClientConfig(httpx_client=httpx_client)
-      )
-
-      input_dict = {"user": user, "prompt": prompt} 
-
-      agent_payload: dict[str, Any] = {
-              "message": {
-                  "role": "user",
-                  "parts": [
-                      {"kind": "text", "text": json.dumps(input_dict)},
-                  ],
-                  "messageId": uuid.uuid4().hex,
-              },
-          }
-
-      agent_response_iterator = agent_client.send_message(request=Message(**agent_payload["message"]))
-      
-      text = ""
-      async for response_item in agent_response_iterator:
+# Agent cards, HTTP connections and A2A clients, shared by every message this process routes
+a2a_clients = A2AClientRegistry()
+
+async def execute_a2a_agent(agent_card_url: str, user: str, prompt: str) -> tuple[str, TaskState]:
+    """Sends the prompt to the agent; returns its answer and the state its task ended in."""
+
+    # cached card and pooled connection, so sending the message is the only request
+    agent_client = await a2a_clients.get_client(agent_card_url)
+
+    input_dict = {"user": user, "prompt": prompt} 
+
+    agent_payload: dict[str, Any] = {
+            "message": {
+                "role": "user",
+                "parts": [
+                    {"kind": "text", "text": json.dumps(input_dict)},
+                ],
+                "messageId": uuid.uuid4().hex,
+            },
+        }
+
+    text = ""
+    # A plain message reply is an answer in itself
+    state = TaskState.completed
+    try:
+      async for response_item in agent_client.send_message(request=Message(**agent_payload["message"])):
           if isinstance(response_item, Message):
               agent_response_json = response_item.model_dump(mode='json', exclude_none=True)
               # Structure might vary, safeguard access
               parts = agent_response_json.get("parts", [])
               if parts and isinstance(parts, list):
                   text = parts[0].get("text", "")
-      
-      return text
+          else:
+              # Streaming agents send (task, update) pairs; the task carries the answer streamed so far
+              task, _ = response_item
+              text = _artifact_text(task) or text
+              state = task.status.state
+    except Exception:
+      # The agent may have restarted or moved; fetch its card again next time
+      a2a_clients.invalidate(agent_card_url)
+      raise
+    
+    return text, state
+
+
+def _artifact_text(task: Task) -> str:
+    for artifact in task.artifacts or []:
+        if artifact.name == "answer":
+            return "".join(getattr(part.root, "text", "") for part in artifact.parts)
+    # A failed or rejected (overloaded) task explains itself in its status message
+    if task.status.state in (TaskState.failed, TaskState.rejected) and task.status.message:
+        return "".join(getattr(part.root, "text", "") for part in task.status.message.parts)
+    return ""
 
 
 
@@ -114,6 +138,10 @@ class RouterHRAgent:
         self.system_prompt = system_prompt
         self.user = user
         self.debug = debug
+        # Built on first use from the agent cards, see _semantic_route
+        self.semantic_router = None
+        self.semantic_router_lock = asyncio.Lock()
+        self.semantic_router_failed_at = None
 
         router_graph = StateGraph(RouterAgentState)
         router_graph.add_node("Router", self.call_llm)
@@ -141,16 +169,70 @@ class RouterHRAgent:
         self.router_graph = router_graph.compile()
     
 
-    def call_llm(self, state: RouterAgentState):
+    def _semantic_router_backing_off(self) -> bool:
+      return (self.semantic_router_failed_at is not None
+              and time.monotonic() - self.semantic_router_failed_at < SEMANTIC_ROUTER_RETRY_SECONDS)
+
+
+    async def _get_semantic_router(self) -> SemanticRouter | None:
+      """The semantic router, built once by whichever query needs it first; None while it can't be built."""
+      if self.semantic_router is not None or self._semantic_router_backing_off():
+        return self.semantic_router
+      # Concurrent queries wait for one build instead of each loading the cards and the model
+      async with self.semantic_router_lock:
+        if self.semantic_router is None and not self._semantic_router_backing_off():
+          try:
+            route_texts = {
+              "POLICY": card_route_texts(await a2a_clients.get_card(hr_policy_agent_url)),
+              "TIMEOFF": card_route_texts(await a2a_clients.get_card(timeoff_agent_url)),
+            }
+            # Loading the embeddings model takes a while the first time; keep the loop free meanwhile
+            embeddings = await asyncio.to_thread(get_embeddings)
+            self.semantic_router = await SemanticRouter.from_texts(
+              embeddings, route_texts, **SemanticRouter.thresholds_from_env())
+            self.semantic_router_failed_at = None
+          except Exception as e:
+            # e.g. an agent isn't up yet to read its card from; the LLM routes until the retry
+            log_message(actor, f"Semantic routing unavailable for {SEMANTIC_ROUTER_RETRY_SECONDS}s: {e}")
+            self.semantic_router_failed_at = time.monotonic()
+      return self.semantic_router
+
+
+    async def _semantic_route(self, query: str) -> str | None:
+      semantic_router = await self._get_semantic_router()
+      if semantic_router is None:
+        return None
+      try:
+        return await semantic_router.route(query)
+      except Exception as e:
+        # The LLM can still route this one
+        log_message(actor, f"Semantic routing failed: {e}")
+        return None
+
+
+    async def call_llm(self, state: RouterAgentState):
       
       messages = state["messages"]
+      # Timed per path, router.route.semantic or router.route.llm, to show what the semantic router saves;
+      # the LLM path includes the semantic lookup that came up ambiguous
+      route_started = time.perf_counter()
+
+      # Clear-cut queries are routed in milliseconds, without a generation
+      if semantic_routing:
+        route = await self._semantic_route(messages[0].content)
+        if route:
+          observe_stage("router.route.semantic", time.perf_counter() - route_started)
+          if self.debug:
+            log_message(actor, f"Semantic route : {route}")
+          return {"messages": [AIMessage(content=route)]}
 
       # Crate system message to set persona to LLM. 
       # This system prompt asks LLM to act as agent router
       if self.system_prompt:
         messages = [SystemMessage(content=self.system_prompt)] + messages
 
-      llm_response = self.model.invoke(messages)
+      llm_response = await self.model.ainvoke(messages)
+      observe_stage("router.route.llm", time.perf_counter() - route_started)
 
       if self.debug:
         log_message(actor, f"LLM response : {llm_response}")
@@ -174,7 +256,7 @@ class RouterHRAgent:
       return destination
 
     
-    def call_policy_agent(self, state: RouterAgentState):
+    async def call_policy_agent(self, state: RouterAgentState):
       
       messages = state["messages"]
 
@@ -185,15 +267,17 @@ class RouterHRAgent:
         log_message(actor, f"Policy Agent node received : {original_prompt}")     
 
       # Invoke the HR Policy agent with original prompt 
-      policy_agent_response = asyncio.run(execute_a2a_agent("http://localhost:9001", self.user, original_prompt))
+      policy_agent_response, task_state = await execute_a2a_agent(hr_policy_agent_url, self.user, original_prompt)
 
       if self.debug:
         log_message(actor, f"Policy Agent response : {policy_agent_response}")
 
-      return {"messages": [AIMessage(content=policy_agent_response)]} # the graph engine adds this AIMessage to the shared state
+      # The task state tells callers a failed or rejected task apart from an answer
+      response = AIMessage(content=policy_agent_response, response_metadata={"a2a_task_state": task_state})
+      return {"messages": [response]} # the graph engine adds this AIMessage to the shared state
 
 
-    def call_timeoff_agent(self, state: RouterAgentState):
+    async def call_timeoff_agent(self, state: RouterAgentState):
       messages = state["messages"]
 
       # read original prompt from the user
@@ -203,12 +287,13 @@ class RouterHRAgent:
         log_message(actor, f"Timeoff Agent node received : {original_prompt}")
 
       # Invoke the TimeOff agent with original prompt
-      timeoff_agent_response = asyncio.run(execute_a2a_agent("http://localhost:9002", self.user, original_prompt))
+      timeoff_agent_response, task_state = await execute_a2a_agent(timeoff_agent_url, self.user, original_prompt)
 
       if self.debug:
         log_message(actor, f"Timeoff Agent response : {timeoff_agent_response}")
 
-      return {"messages": [AIMessage(content=timeoff_agent_response)]} # the graph engine adds this AIMessage to the shared state
+      response = AIMessage(content=timeoff_agent_response, response_metadata={"a2a_task_state": task_state})
+      return {"messages": [response]} # the graph engine adds this AIMessage to the shared state
 
     
     def unsupported_node(self, state: RouterAgentState):
@@ -229,11 +314,8 @@ class RouterHRAgent:
 
 
 
-if __name__ == "__main__":
-
-  try:
+async def main():
     # Mimic chatbot
-
     router_hr_agent = RouterHRAgent(model, system_prompt, user, debug=False)
 
     user_inputs = [
@@ -245,16 +327,24 @@ if __name__ == "__main__":
             "how to handle conflicts?"
         ]
 
-    for input in user_inputs:
-            print(f"----------------------------------------\nUSER : {input}")
-            # Format the user message
-            user_message = {"messages": [HumanMessage(input)]}
-            # Get response from the agent
-            ai_response = router_hr_agent.router_graph.invoke(
-                user_message, config=router_graph_config)
-            # Print the response
-            print(f"\nAGENT : {ai_response['messages'][-1].content}")
+    try:
+      for input in user_inputs:
+              print(f"----------------------------------------\nUSER : {input}")
+              # Format the user message
+              user_message = {"messages": [HumanMessage(input)]}
+              # Get response from the agent; every node runs on this one event loop
+              ai_response = await router_hr_agent.router_graph.ainvoke(
+                  user_message, config=router_graph_config)
+              # Print the response
+              print(f"\nAGENT : {ai_response['messages'][-1].content}")
+    finally:
+      await a2a_clients.aclose()
+
+
+if __name__ == "__main__":
+
+  try:
+    asyncio.run(main())
 
   except Exception as e:
     log_message(actor, f"An error occurred: {e}")
-  
\ No newline at end of file
@@ -0,0 +1,101 @@
+import math
+import os
+
+
+# A query at least this similar to the best route, and ahead of the runner-up by
+# at least the margin, is routed without asking the LLM
+DEFAULT_MIN_SIMILARITY = 0.45
+DEFAULT_MIN_MARGIN = 0.1
+# A query less similar than this to every route is unsupported, without asking the LLM
+DEFAULT_UNSUPPORTED_BELOW = 0.15
+
+UNSUPPORTED = "UNSUPPORTED"
+
+
+def _normalize(vector: list[float]) -> list[float]:
+  norm = math.sqrt(sum(x * x for x in vector))
+  return [x / norm for x in vector] if norm else vector
+
+
+def _centroid(vectors: list[list[float]]) -> list[float]:
+  normalized = [_normalize(vector) for vector in vectors]
+  return _normalize([sum(values) / len(normalized) for values in zip(*normalized)])
+
+
+def card_route_texts(card) -> list[str]:
+  """The example queries and tags of every skill on an agent card."""
+  texts = []
+  for skill in card.skills or []:
+    texts.extend(skill.examples or [])
+    texts.extend(skill.tags or [])
+  return texts
+
+
+#---------------------------------------------------------------------
+# Semantic Router
+#---------------------------------------------------------------------
+class SemanticRouter:
+  """Routes queries by embedding similarity to a centroid per route.
+
+  Each route's centroid is the mean of the embeddings of its example
+  texts, e.g. the skill examples and tags of the agent behind it. A query
+  is embedded once and compared to every centroid by cosine similarity:
+    * best similarity >= min_similarity, ahead of the runner-up by
+      >= min_margin: that route
+    * best similarity < unsupported_below: UNSUPPORTED
+    * anything in between is ambiguous: None, for the caller to ask the LLM
+  Embedding a query takes milliseconds, against seconds for a generation.
+  """
+
+  def __init__(self, embeddings, centroids: dict[str, list[float]],
+               min_similarity: float = DEFAULT_MIN_SIMILARITY,
+               min_margin: float = DEFAULT_MIN_MARGIN,
+               unsupported_below: float = DEFAULT_UNSUPPORTED_BELOW):
+    self.embeddings = embeddings
+    self.centroids = centroids
+    self.min_similarity = min_similarity
+    self.min_margin = min_margin
+    self.unsupported_below = unsupported_below
+
+
+  @classmethod
+  async def from_texts(cls, embeddings, route_texts: dict[str, list[str]], **thresholds):
+    """Builds the centroids by embedding each route's example texts."""
+    centroids = {}
+    for route, texts in route_texts.items():
+      centroids[route] = _centroid(await embeddings.aembed_documents(texts))
+    return cls(embeddings, centroids, **thresholds)
+
+
+  @staticmethod
+  def thresholds_from_env() -> dict:
+    """Reads ROUTER_MIN_SIMILARITY, ROUTER_MIN_MARGIN and ROUTER_UNSUPPORTED_BELOW."""
+    return {
+      "min_similarity": float(os.getenv("ROUTER_MIN_SIMILARITY", DEFAULT_MIN_SIMILARITY)),
+      "min_margin": float(os.getenv("ROUTER_MIN_MARGIN", DEFAULT_MIN_MARGIN)),
+      "unsupported_below": float(os.getenv("ROUTER_UNSUPPORTED_BELOW", DEFAULT_UNSUPPORTED_BELOW)),
+    }
+
+
+  def similarities(self, query_vector: list[float]) -> dict[str, float]:
+    query_vector = _normalize(query_vector)
+    return {route: sum(q * c for q, c in zip(query_vector, centroid))
+            for route, centroid in self.centroids.items()}
+
+
+  def classify(self, query_vector: list[float]) -> str | None:
+    """The route for an embedded query, UNSUPPORTED, or None when ambiguous."""
+    ranked = sorted(self.similarities(query_vector).items(), key=lambda item: item[1], reverse=True)
+    if not ranked:
+      return None
+    best_route, best = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else -1.0
+    if best < self.unsupported_below:
+      return UNSUPPORTED
+    if best >= self.min_similarity and best - runner_up >= self.min_margin:
+      return best_route
+    return None
+
+
+  async def route(self, query: str) -> str | None:
+    return self.classify(await self.embeddings.aembed_query(query))
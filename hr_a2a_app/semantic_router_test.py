@@ -0,0 +1,70 @@
+import sys
+import os
+import asyncio
+
+
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.log_utils import log_message
+from semantic_router import SemanticRouter, UNSUPPORTED
+
+
+class SemanticRouterTest:
+  """Test class for SemanticRouter"""
+
+  class MockEmbeddings:
+    """Bag of words over a tiny vocabulary, so similarities are predictable"""
+    vocabulary = ["policy", "remote", "leave", "timeoff", "balance", "request", "days"]
+
+    def embed(self, text):
+      words = text.lower().replace("?", "").split()
+      return [float(words.count(word)) for word in self.vocabulary]
+
+    async def aembed_documents(self, texts):
+      return [self.embed(text) for text in texts]
+
+    async def aembed_query(self, text):
+      return self.embed(text)
+
+
+  ROUTE_TEXTS = {
+    "POLICY": ["policy on remote work", "policy on sick leave", "policy"],
+    "TIMEOFF": ["timeoff balance", "timeoff request for days", "timeoff"],
+  }
+
+
+  async def test_routing(self):
+    """Clear queries should be routed, unrelated ones unsupported, and mixed ones left to the LLM"""
+    router = await SemanticRouter.from_texts(self.MockEmbeddings(), self.ROUTE_TEXTS,
+                                             min_similarity=0.5, min_margin=0.2, unsupported_below=0.1)
+    assert await router.route("what is the remote policy?") == "POLICY"
+    assert await router.route("what is my timeoff balance?") == "TIMEOFF"
+    assert await router.route("tell me about payroll") == UNSUPPORTED
+    assert await router.route("policy on timeoff") is None, "Expected a query close to both routes to be ambiguous"
+    log_message("Test", "✓ Routing assertions passed!")
+
+
+  async def test_thresholds(self):
+    """The ambiguous band should follow the configured thresholds"""
+    for margin, expected in [(0.3, None), (0.1, "TIMEOFF")]:
+      router = await SemanticRouter.from_texts(self.MockEmbeddings(), self.ROUTE_TEXTS,
+                                               min_similarity=0.3, min_margin=margin, unsupported_below=0.1)
+      route = await router.route("leave balance request days")
+      similarities = router.similarities(self.MockEmbeddings().embed("leave balance request days"))
+      log_message("Test", f"Margin {margin}: {route} from {similarities}")
+      assert route == expected, f"Expected {expected} with margin {margin}, got {route}"
+
+    os.environ["ROUTER_MIN_SIMILARITY"] = "0.9"
+    try:
+      thresholds = SemanticRouter.thresholds_from_env()
+    finally:
+      del os.environ["ROUTER_MIN_SIMILARITY"]
+    assert thresholds["min_similarity"] == 0.9 and thresholds["min_margin"] == 0.1, thresholds
+    log_message("Test", "✓ Threshold assertions passed!")
+
+
+if __name__ == "__main__":
+  # Run the tests
+  test_suite = SemanticRouterTest()
+  asyncio.run(test_suite.test_routing())
+  asyncio.run(test_suite.test_thresholds())
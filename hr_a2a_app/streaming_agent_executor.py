@@ -0,0 +1,169 @@
+import sys
+import os
+import asyncio
+import json
+import uuid
+from contextlib import nullcontext
+
+from typing_extensions import override
+
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Part, TaskNotCancelableError, TaskState, TextPart
+from a2a.utils.errors import ServerError
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# comment below line when you run this code as module with `uv python3 -m hr-a2a-app.hr-policy-a2a-wrapper-server`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),'../')))
+from utils.log_utils import log_message
+from utils.metrics import track_stage
+from admission_control import AdmissionController, AdmissionRejected
+
+
+#---------------------------------------------------------------------
+# Streaming Agent Executor
+#---------------------------------------------------------------------
+class StreamingAgentExecutor(AgentExecutor):
+  """Base for executors that stream an agent's answer while it is generated.
+
+  Subclasses implement stream_agent(context, user_input), an async iterator
+  of ("token" | "tool" | "final", text) events. Each token is appended to
+  the task's "answer" artifact as it arrives, each tool call is reported as
+  a working status update, and the final answer replaces the artifact before
+  the task completes.
+
+  Each run is an asyncio task tracked by A2A task id, so cancel() can stop
+  it promptly: cancellation unwinds the agent's async with blocks, which
+  closes its MCP session or subprocess, and execute() ends the A2A task
+  canceled on its own event queue, which the request handler is still
+  reading from.
+  Only runs of this process can be canceled; with several workers the
+  cancel request has to reach the worker running the task.
+
+  Subclasses may set admission to an AdmissionController: runs then wait
+  for a slot while the task stays submitted, and are rejected with a
+  retry_after_seconds hint in the status metadata when the queue is full.
+  """
+
+  actor = "Streaming Agent Executor"
+  admission: AdmissionController | None = None
+
+  def __init__(self):
+    # A2A task id -> (asyncio task running the agent, set once execute() has reported how it ended)
+    self.running_tasks: dict[str, tuple[asyncio.Task, asyncio.Event]] = {}
+
+  def stream_agent(self, context: RequestContext, user_input: dict):
+    raise NotImplementedError
+
+
+  @override
+  async def execute(
+    self,
+    context: RequestContext,
+    event_queue: EventQueue) -> None:
+
+    user_input = json.loads(context.get_user_input())
+    log_message(self.actor, f"User prompt received: {user_input.get('prompt')}")
+
+    updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+    if not context.current_task:
+      await updater.submit()
+
+    run = asyncio.create_task(self._admit_and_stream(context, user_input, updater))
+    reported = asyncio.Event()
+    self.running_tasks[context.task_id] = (run, reported)
+    try:
+      await run
+    except asyncio.CancelledError:
+      if asyncio.current_task().cancelling():
+        # This call itself was cancelled, e.g. the client went away: stop the agent too
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+        raise
+      # Otherwise cancel() stopped the run. The status goes on this queue: the
+      # request handler closes it once execute() returns, along with the queue
+      # it handed cancel(), which only receives what is published here.
+      log_message(self.actor, f"Task {context.task_id} canceled")
+      await updater.cancel(updater.new_agent_message([Part(root=TextPart(text="Request canceled"))]))
+    finally:
+      self.running_tasks.pop(context.task_id, None)
+      reported.set()
+
+
+  async def _admit_and_stream(self, context: RequestContext, user_input: dict, updater: TaskUpdater):
+    try:
+      # a2a.task includes the wait for an admission slot, a2a.agent_run doesn't
+      with track_stage("a2a.task"):
+        async with self.admission.admit() if self.admission else nullcontext():
+          await updater.start_work()
+          with track_stage("a2a.agent_run"):
+            await self._stream_answer(context, user_input, updater)
+    except AdmissionRejected as e:
+      log_message(self.actor, f"Task {context.task_id} rejected: {e}")
+      await updater.update_status(
+        TaskState.rejected,
+        updater.new_agent_message([Part(root=TextPart(text=str(e)))]),
+        final=True,
+        metadata={"retry_after_seconds": e.retry_after_seconds})
+
+
+  async def _stream_answer(self, context: RequestContext, user_input: dict, updater: TaskUpdater):
+    artifact_id = uuid.uuid4().hex
+    streamed_tokens = False
+    result = ""
+    try:
+      async for kind, text in self.stream_agent(context, user_input):
+        if kind == "token":
+          # The first chunk creates the artifact, the rest are appended to it
+          await updater.add_artifact([Part(root=TextPart(text=text))], artifact_id=artifact_id,
+                                     name="answer", append=streamed_tokens, last_chunk=False)
+          streamed_tokens = True
+        elif kind == "tool":
+          await updater.update_status(TaskState.working, updater.new_agent_message(
+            [Part(root=TextPart(text=f"Calling tool {text}..."))]))
+        elif kind == "final":
+          result = text
+    except Exception as e:
+      log_message(self.actor, f"Agent failed: {e}")
+      await updater.failed(updater.new_agent_message([Part(root=TextPart(text=f"Agent failed: {e}"))]))
+      return
+
+    log_message(self.actor, f"Result received: {result}")
+    # Tokens of intermediate LLM calls may be in the artifact too, so the final answer replaces it
+    await updater.add_artifact([Part(root=TextPart(text=result))], artifact_id=artifact_id,
+                               name="answer", append=False, last_chunk=True)
+    await updater.complete()
+
+
+  @override
+  async def cancel(
+    self,
+    context: RequestContext,
+    event_queue: EventQueue) -> None:
+
+    run, reported = self.running_tasks.get(context.task_id, (None, None))
+    if run is None or run.done():
+      raise ServerError(error=TaskNotCancelableError(message=f"Task {context.task_id} is not running"))
+
+    log_message(self.actor, f"Canceling task {context.task_id}")
+    run.cancel()
+    # Wait for the agent to unwind, so its session or subprocess is closed, and for
+    # execute() to publish the canceled status; the request handler cancels
+    # execute() itself as soon as we return
+    await reported.wait()
+
+
+def stats_route(executor: StreamingAgentExecutor, task_store) -> Route:
+  """GET /stats: admission queue depth and wait times, and task store size and evictions, as JSON."""
+
+  async def stats(request: Request) -> JSONResponse:
+    return JSONResponse({
+      "admission": executor.admission.stats() if executor.admission else None,
+      "running_tasks": len(executor.running_tasks),
+      "task_store": await task_store.stats(),
+    })
+
+  return Route("/stats", stats, methods=["GET"])
@@ -0,0 +1,174 @@
+import sys
+import os
+import json
+import asyncio
+import uuid
+
+
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.log_utils import log_message
+from streaming_agent_executor import StreamingAgentExecutor
+from admission_control import AdmissionController
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import (Message, MessageSendConfiguration, MessageSendParams, Part, Role, TaskArtifactUpdateEvent,
+                       TaskIdParams, TaskState, TaskStatusUpdateEvent, TextPart)
+from a2a.utils.errors import ServerError
+
+
+class StreamingAgentExecutorTest:
+  """Test class for StreamingAgentExecutor"""
+
+  # Mock classes for testing
+  class MockRequestContext:
+    context_id = "test-context-1"
+    current_task = None
+    message = None
+
+    def __init__(self, task_id):
+      self.task_id = task_id
+
+    def get_user_input(self):
+      return json.dumps({"user": "Alice", "prompt": "What is the vacation policy?"})
+
+
+  class MockEventQueue:
+    def __init__(self):
+      self.events = []
+
+    async def enqueue_event(self, event):
+      self.events.append(event)
+
+
+  class ScriptedAgentExecutor(StreamingAgentExecutor):
+    """Streams a fixed script of agent events, optionally hanging before the end"""
+
+    def __init__(self, hang=False):
+      super().__init__()
+      self.actor = "Scripted Agent Executor"
+      self.hang = hang
+      self.closed = asyncio.Event()
+
+    async def stream_agent(self, context, user_input):
+      try:
+        yield "tool", "query_policies"
+        yield "token", "Vacation "
+        yield "token", "is 20 days."
+        if self.hang:
+          await asyncio.sleep(3600)
+        yield "final", "Vacation is 20 days."
+      finally:
+        # Stands in for closing the agent's MCP session or subprocess
+        self.closed.set()
+
+
+  async def test_streaming(self):
+    """Tokens should stream as artifact chunks before the final answer"""
+    executor = self.ScriptedAgentExecutor()
+    event_queue = self.MockEventQueue()
+    await executor.execute(self.MockRequestContext("test-task-1"), event_queue)
+
+    events = event_queue.events
+    states = [event.status.state for event in events if isinstance(event, TaskStatusUpdateEvent)]
+    assert states == [TaskState.submitted, TaskState.working, TaskState.working, TaskState.completed], states
+
+    chunks = [event for event in events if isinstance(event, TaskArtifactUpdateEvent)]
+    assert [chunk.artifact.parts[0].root.text for chunk in chunks] == \
+      ["Vacation ", "is 20 days.", "Vacation is 20 days."]
+    assert [chunk.append for chunk in chunks] == [False, True, False], "Expected the final answer to replace the chunks"
+    assert len({chunk.artifact.artifact_id for chunk in chunks}) == 1, "Expected one answer artifact"
+    assert executor.closed.is_set()
+    log_message("Test", "✓ Streaming assertions passed!")
+
+
+  async def test_cancel(self):
+    """Canceling should stop the agent promptly and end the task canceled"""
+    executor = self.ScriptedAgentExecutor(hang=True)
+    context = self.MockRequestContext("test-task-2")
+    execute_queue = self.MockEventQueue()
+    execution = asyncio.create_task(executor.execute(context, execute_queue))
+    while not any(isinstance(event, TaskArtifactUpdateEvent) for event in execute_queue.events):
+      await asyncio.sleep(0.01)
+
+    cancel_queue = self.MockEventQueue()
+    await asyncio.wait_for(executor.cancel(context, cancel_queue), timeout=1)
+    await asyncio.wait_for(execution, timeout=1)
+
+    assert executor.closed.is_set(), "Expected the agent stream to be closed"
+    assert execute_queue.events[-1].status.state == TaskState.canceled, \
+      "Expected the canceled status on the queue of the run, which the request handler is reading"
+    assert not executor.running_tasks
+    assert not any(isinstance(event, TaskStatusUpdateEvent) and event.status.state == TaskState.completed
+                   for event in execute_queue.events), "Expected the canceled run not to complete"
+
+    try:
+      await executor.cancel(context, self.MockEventQueue())
+      assert False, "Expected a finished task not to be cancelable"
+    except ServerError:
+      pass
+    log_message("Test", "✓ Cancel assertions passed!")
+
+
+  async def test_cancel_through_request_handler(self):
+    """tasks/cancel through the A2A request handler should end the stored task canceled"""
+    executor = self.ScriptedAgentExecutor(hang=True)
+    task_store = InMemoryTaskStore()
+    handler = DefaultRequestHandler(agent_executor=executor, task_store=task_store)
+    message = Message(role=Role.user, message_id=uuid.uuid4().hex, parts=[
+      Part(root=TextPart(text=json.dumps({"user": "Alice", "prompt": "What is the vacation policy?"})))])
+    task = await handler.on_message_send(
+      MessageSendParams(message=message, configuration=MessageSendConfiguration(blocking=False)))
+
+    # Wait for the agent to be streaming its answer
+    while not (await task_store.get(task.id)).artifacts:
+      await asyncio.sleep(0.01)
+
+    canceled = await asyncio.wait_for(handler.on_cancel_task(TaskIdParams(id=task.id)), timeout=1)
+    assert canceled.status.state == TaskState.canceled, canceled.status
+    assert executor.closed.is_set(), "Expected the agent stream to be closed"
+    stored = await task_store.get(task.id)
+    assert stored.status.state == TaskState.canceled, f"Expected the stored task to be canceled, got {stored.status}"
+    log_message("Test", "✓ Request handler cancel assertions passed!")
+
+
+  async def test_running_tasks_per_executor(self):
+    """Each executor should count only its own runs, e.g. for /stats with both agents in one host"""
+    busy, idle = self.ScriptedAgentExecutor(hang=True), self.ScriptedAgentExecutor()
+    context = self.MockRequestContext("test-task-5")
+    execution = asyncio.create_task(busy.execute(context, self.MockEventQueue()))
+    await asyncio.sleep(0.05)
+    assert len(busy.running_tasks) == 1 and not idle.running_tasks, "Expected runs to be tracked per executor"
+    await busy.cancel(context, self.MockEventQueue())
+    await execution
+    log_message("Test", "✓ Per-executor run assertions passed!")
+
+
+  async def test_admission_rejection(self):
+    """Runs beyond the admission limits should be rejected with a retry hint"""
+    executor = self.ScriptedAgentExecutor(hang=True)
+    executor.admission = AdmissionController(max_concurrent=1, max_queued=0)
+    busy_context = self.MockRequestContext("test-task-3")
+    execution = asyncio.create_task(executor.execute(busy_context, self.MockEventQueue()))
+    await asyncio.sleep(0.05)
+
+    event_queue = self.MockEventQueue()
+    await asyncio.wait_for(executor.execute(self.MockRequestContext("test-task-4"), event_queue), timeout=1)
+    rejected = event_queue.events[-1]
+    assert rejected.status.state == TaskState.rejected and rejected.final, "Expected the task to be rejected"
+    assert rejected.metadata["retry_after_seconds"] >= 1, rejected.metadata
+    assert executor.admission.stats()["rejected"] == 1
+
+    await executor.cancel(busy_context, self.MockEventQueue())
+    await execution
+    log_message("Test", "✓ Admission rejection assertions passed!")
+
+
+if __name__ == "__main__":
+  # Run the tests
+  test_suite = StreamingAgentExecutorTest()
+  asyncio.run(test_suite.test_streaming())
+  asyncio.run(test_suite.test_cancel())
+  asyncio.run(test_suite.test_cancel_through_request_handler())
+  asyncio.run(test_suite.test_running_tasks_per_executor())
+  asyncio.run(test_suite.test_admission_rejection())
@@ -0,0 +1,212 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from typing_extensions import override
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import TaskStore
+from a2a.types import Task
+
+
+# How long a worker waits for another worker's write to finish
+BUSY_TIMEOUT_SECONDS = 30
+# Tasks not updated for this long are dropped
+DEFAULT_TASK_TTL_SECONDS = 3600
+# At most this many tasks are kept; the least recently updated go first
+DEFAULT_MAX_TASKS = 10_000
+# The SQLite store sweeps expired and surplus tasks once per this many saves
+SQLITE_EVICTION_INTERVAL = 100
+
+
+def task_store_from_env(db_path: str | None = None) -> TaskStore:
+  """SQLiteTaskStore on db_path if given, else BoundedInMemoryTaskStore.
+
+  Limits come from A2A_TASK_TTL_SECONDS and A2A_TASK_MAX_ENTRIES.
+  """
+  ttl_seconds = float(os.getenv("A2A_TASK_TTL_SECONDS", DEFAULT_TASK_TTL_SECONDS))
+  max_entries = int(os.getenv("A2A_TASK_MAX_ENTRIES", DEFAULT_MAX_TASKS))
+  if db_path:
+    return SQLiteTaskStore(db_path, ttl_seconds, max_entries)
+  return BoundedInMemoryTaskStore(ttl_seconds, max_entries)
+
+
+#---------------------------------------------------------------------
+# Bounded In-Memory Task Store
+#---------------------------------------------------------------------
+class BoundedInMemoryTaskStore(TaskStore):
+  """A2A task store in process memory that drops old tasks.
+
+  InMemoryTaskStore keeps every task and its messages for the life of the
+  process. This one drops tasks that have not been updated for ttl_seconds
+  and, past max_entries, the least recently updated ones.
+  """
+
+  def __init__(self, ttl_seconds: float = DEFAULT_TASK_TTL_SECONDS, max_entries: int = DEFAULT_MAX_TASKS):
+    self.ttl_seconds = ttl_seconds
+    self.max_entries = max_entries
+    # task id -> (task, last update time), least recently updated first
+    self.tasks: OrderedDict[str, tuple[Task, float]] = OrderedDict()
+    self.expired_evictions = 0
+    self.capacity_evictions = 0
+
+
+  def _evict(self, now):
+    while self.tasks:
+      _, updated_at = next(iter(self.tasks.values()))
+      if now - updated_at < self.ttl_seconds:
+        break
+      self.tasks.popitem(last=False)
+      self.expired_evictions += 1
+    while len(self.tasks) > self.max_entries:
+      self.tasks.popitem(last=False)
+      self.capacity_evictions += 1
+
+
+  @override
+  async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+    now = time.monotonic()
+    self.tasks[task.id] = (task, now)
+    self.tasks.move_to_end(task.id)
+    self._evict(now)
+
+
+  @override
+  async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+    entry = self.tasks.get(task_id)
+    if entry is None:
+      return None
+    task, updated_at = entry
+    if time.monotonic() - updated_at >= self.ttl_seconds:
+      del self.tasks[task_id]
+      self.expired_evictions += 1
+      return None
+    return task
+
+
+  @override
+  async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+    self.tasks.pop(task_id, None)
+
+
+  async def stats(self) -> dict:
+    return {
+      "size": len(self.tasks),
+      "max_entries": self.max_entries,
+      "ttl_seconds": self.ttl_seconds,
+      "expired_evictions": self.expired_evictions,
+      "capacity_evictions": self.capacity_evictions,
+    }
+
+
+#---------------------------------------------------------------------
+# SQLite Task Store
+#---------------------------------------------------------------------
+class SQLiteTaskStore(TaskStore):
+  """A2A task store in a SQLite file, shared by all the worker processes of a server.
+
+  InMemoryTaskStore keeps tasks in one process, so with several uvicorn
+  workers a tasks/get could land on a worker that never saw the task.
+  Tasks are stored as JSON keyed by task id; queries run on a thread so
+  the event loop never waits on disk I/O. Expired tasks are never returned,
+  and every SQLITE_EVICTION_INTERVAL saves the store deletes them along
+  with the least recently updated tasks beyond max_entries.
+  """
+
+  def __init__(self, db_path: str, ttl_seconds: float = DEFAULT_TASK_TTL_SECONDS,
+               max_entries: int = DEFAULT_MAX_TASKS):
+    self.db_path = db_path
+    self.ttl_seconds = ttl_seconds
+    self.max_entries = max_entries
+    self.saves_since_eviction = 0
+    # Counted per process; every worker sweeps the shared file
+    self.expired_evictions = 0
+    self.capacity_evictions = 0
+
+    self.conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+    # Let readers proceed while another worker writes
+    self.conn.execute('PRAGMA journal_mode=WAL')
+    self.conn.execute('''
+      CREATE TABLE IF NOT EXISTS a2a_task (
+        id TEXT PRIMARY KEY,
+        task_json TEXT NOT NULL,
+        updated_at REAL NOT NULL
+      )
+    ''')
+    self.conn.execute('CREATE INDEX IF NOT EXISTS idx_a2a_task_updated_at ON a2a_task (updated_at)')
+    self.conn.commit()
+    self.lock = threading.Lock()
+
+
+  def _execute(self, sql, params=()):
+    with self.lock:
+      cursor = self.conn.execute(sql, params)
+      rows = cursor.fetchall()
+      self.conn.commit()
+      return rows, cursor.rowcount
+
+
+  def _save(self, task_id, task_json):
+    # Wall clock time, since workers in other processes compare against it
+    now = time.time()
+    self._execute('''
+      INSERT INTO a2a_task (id, task_json, updated_at) VALUES (?, ?, ?)
+      ON CONFLICT(id) DO UPDATE SET task_json = excluded.task_json, updated_at = excluded.updated_at
+    ''', (task_id, task_json, now))
+    self.saves_since_eviction += 1
+    if self.saves_since_eviction >= SQLITE_EVICTION_INTERVAL:
+      self.saves_since_eviction = 0
+      self._evict(now)
+
+
+  def _evict(self, now):
+    _, expired = self._execute('DELETE FROM a2a_task WHERE updated_at < ?', (now - self.ttl_seconds,))
+    # Everything past the newest max_entries tasks, found by walking the updated_at index
+    _, surplus = self._execute('''
+      DELETE FROM a2a_task WHERE updated_at <= (
+        SELECT updated_at FROM a2a_task ORDER BY updated_at DESC LIMIT 1 OFFSET ?
+      )
+    ''', (self.max_entries,))
+    self.expired_evictions += max(expired, 0)
+    self.capacity_evictions += max(surplus, 0)
+
+
+  def _get(self, task_id):
+    rows, _ = self._execute('SELECT task_json FROM a2a_task WHERE id = ? AND updated_at >= ?',
+                            (task_id, time.time() - self.ttl_seconds))
+    return rows[0][0] if rows else None
+
+
+  @override
+  async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+    await asyncio.to_thread(self._save, task.id, task.model_dump_json())
+
+
+  @override
+  async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+    task_json = await asyncio.to_thread(self._get, task_id)
+    return Task.model_validate_json(task_json) if task_json else None
+
+
+  @override
+  async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+    await asyncio.to_thread(self._execute, 'DELETE FROM a2a_task WHERE id = ?', (task_id,))
+
+
+  async def stats(self) -> dict:
+    (size,), = (await asyncio.to_thread(self._execute, 'SELECT COUNT(*) FROM a2a_task'))[0]
+    return {
+      "size": size,
+      "max_entries": self.max_entries,
+      "ttl_seconds": self.ttl_seconds,
+      "expired_evictions": self.expired_evictions,
+      "capacity_evictions": self.capacity_evictions,
+    }
+
+
+  def close(self):
+    with self.lock:
+      self.conn.close()
@@ -0,0 +1,74 @@
+import sys
+import os
+import asyncio
+import tempfile
+import time
+
+
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.log_utils import log_message
+import task_stores
+from task_stores import BoundedInMemoryTaskStore, SQLiteTaskStore
+from a2a.types import Task, TaskState, TaskStatus
+
+
+def new_task(task_id: str) -> Task:
+  return Task(id=task_id, context_id="test-context", status=TaskStatus(state=TaskState.completed))
+
+
+class TaskStoresTest:
+  """Test class for the bounded A2A task stores"""
+
+  async def test_in_memory_store(self):
+    """The in-memory store should evict by capacity and by age"""
+    store = BoundedInMemoryTaskStore(ttl_seconds=0.2, max_entries=3)
+    for i in range(5):
+      await store.save(new_task(f"task-{i}"))
+    assert await store.get("task-0") is None, "Expected the oldest task to be evicted"
+    assert (await store.get("task-4")).id == "task-4"
+
+    # Updating a task makes it the most recently used again
+    await store.save(new_task("task-2"))
+    await store.save(new_task("task-5"))
+    assert await store.get("task-2") is not None and await store.get("task-3") is None
+
+    time.sleep(0.25)
+    assert await store.get("task-5") is None, "Expected expired tasks not to be returned"
+    await store.save(new_task("task-6"))
+    stats = await store.stats()
+    log_message("Test", f"In-memory task store stats: {stats}")
+    assert stats["size"] == 1 and stats["capacity_evictions"] == 3 and stats["expired_evictions"] == 3, stats
+    log_message("Test", "✓ In-memory task store assertions passed!")
+
+  async def test_sqlite_store(self):
+    """The SQLite store should be shared between instances and evict on its sweep"""
+    task_stores.SQLITE_EVICTION_INTERVAL = 5
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      db_path = os.path.join(tmp_dir, "tasks.db")
+      worker_1 = SQLiteTaskStore(db_path, ttl_seconds=60, max_entries=3)
+      worker_2 = SQLiteTaskStore(db_path, ttl_seconds=60, max_entries=3)
+
+      await worker_1.save(new_task("task-0"))
+      task = await worker_2.get("task-0")
+      assert task is not None and task.status.state == TaskState.completed, "Expected tasks to be shared"
+
+      for i in range(1, 5):
+        await worker_1.save(new_task(f"task-{i}"))
+      stats = await worker_1.stats()
+      log_message("Test", f"SQLite task store stats: {stats}")
+      assert stats["size"] == 3 and stats["capacity_evictions"] == 2, stats
+      assert await worker_2.get("task-1") is None and await worker_2.get("task-4") is not None
+
+      await worker_2.delete("task-4")
+      assert await worker_1.get("task-4") is None
+      worker_1.close()
+      worker_2.close()
+    log_message("Test", "✓ SQLite task store assertions passed!")
+
+
+if __name__ == "__main__":
+  # Run the tests
+  test_suite = TaskStoresTest()
+  asyncio.run(test_suite.test_in_memory_store())
+  asyncio.run(test_suite.test_sqlite_store())
@@ -129,6 +129,8 @@ class RouterChatApp(App):
 
         # Patch router module logger function so we can display logs inside the UI
         self._orig_log_message = router_mod.log_message
+        # The router runs on the UI event loop; server output arrives on pump threads
+        self._ui_thread_id = threading.get_ident()
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
@@ -335,9 +337,15 @@ class RouterChatApp(App):
         ts = datetime.now().strftime("%H:%M:%S")
         self._logs().write(f"[dim]{ts}[/dim] {clean}")
 
+    def _post_log(self, line: str) -> None:
+        if threading.get_ident() == self._ui_thread_id:
+            self._append_log(line)
+        else:
+            self.call_from_thread(self._append_log, line)
+
     def _install_log_hook(self) -> None:
         def _ui_log_message(actor: str, log_msg: str):
-            self.call_from_thread(self._append_log, f"{actor}: {log_msg}")
+            self._post_log(f"{actor}: {log_msg}")
 
         router_mod.log_message = _ui_log_message
 
@@ -465,21 +473,22 @@ class RouterChatApp(App):
         self._reset_result()
         self._set_busy(True)
 
-        capture = _CaptureStream(lambda line: self.call_from_thread(self._append_log, line))
+        capture = _CaptureStream(self._post_log)
 
-        def _run_invoke() -> str:
+        async def _run_invoke() -> str:
             with redirect_stdout(capture), redirect_stderr(capture):
                 if self.router_agent is None:
                     raise RuntimeError("Not logged in")
                 user_message = {"messages": [HumanMessage(prompt)]}
-                result = self.router_agent.router_graph.invoke(
+                # Runs on the UI event loop, so the router's A2A connections stay pooled between prompts
+                result = await self.router_agent.router_graph.ainvoke(
                     user_message,
                     config=router_mod.router_graph_config,
                 )
                 return result["messages"][-1].content
 
         try:
-            worker = self.run_worker(_run_invoke, thread=True, exclusive=True)
+            worker = self.run_worker(_run_invoke(), exclusive=True)
             response = await worker.wait()
             self.last_answer = response
             self._refresh_result()
@@ -514,9 +523,10 @@ class RouterChatApp(App):
 
         await self._process_user_prompt(text)
 
-    def on_unmount(self) -> None:
+    async def on_unmount(self) -> None:
         router_mod.log_message = self._orig_log_message
         self._health_stop.set()
+        await router_mod.a2a_clients.aclose()
 
         for proc in (self._mcp_proc, self._policy_proc, self._timeoff_proc):
             if proc is None:
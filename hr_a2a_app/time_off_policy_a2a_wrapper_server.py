@@ -1,15 +1,12 @@
 import sys
 import os
 
-from typing_extensions import override
-import json
+from contextlib import asynccontextmanager
+import argparse
 
-from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events import EventQueue
+from a2a.server.agent_execution import RequestContext
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.server.apps import A2AStarletteApplication
-from a2a.utils import new_agent_text_message
 from a2a.types import AgentCard, AgentSkill, AgentCapabilities
 
 # comment below line when you run this code as module with `uv python3 -m hr-a2a-app.hr-policy-a2a-wrapper-server`
@@ -18,46 +15,63 @@ from time_off_agent import TimeOffAgent
 # comment below line when you run this code as module with `uv python3 -m hr-a2a-app.hr-policy-a2a-wrapper-server`
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),'../'))) 
 from utils.log_utils import log_message
+from utils.model_utils import start_warm_up
+from utils.metrics import metrics_route
+# This folder too, so task_stores and the uvicorn app factory resolve when run as a module
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from task_stores import task_store_from_env
+from streaming_agent_executor import StreamingAgentExecutor, stats_route
+from admission_control import AdmissionController
 
 
 #---------------------------------------------------------------------
 # Timeoff Agent Executor
 #---------------------------------------------------------------------
-class TimeoffAgentExecutor(AgentExecutor):
+class TimeoffAgentExecutor(StreamingAgentExecutor):
   "Executes Timeoff agent."
 
-  def __init__(self):
+  def __init__(self, mcp_server_url: str = "http://localhost:8000", model=None):
+    super().__init__()
     self.actor = "Timeoff Agent Executor"
+    # Runs share one MCP session, so more of them fit at once than for the policy agent
+    self.admission = AdmissionController.from_env("TIMEOFF_A2A", default_max_concurrent=8, default_max_queued=32)
     log_message(self.actor, "Timeoff Agent Executor initialized")
-    self.timeoff_agent = TimeOffAgent()
-    
+    self.timeoff_agent = TimeOffAgent(mcp_server_url, model=model)
 
-  @override
-  async def execute(
-    self,
-    context: RequestContext,
-    event_queue: EventQueue) -> None:
-    
-    user_input = json.loads(context.get_user_input())
-    log_message(self.actor, f"User prompt received: {user_input.get('prompt')}")
-    
-    async with self.timeoff_agent:
-        result = await self.timeoff_agent.submit_request(user_input.get('user'), user_input.get('prompt'))
 
-    log_message(self.actor, f"Result received: {result}")
-    await event_queue.enqueue_event(new_agent_text_message(result))
+  @asynccontextmanager
+  async def lifespan(self, app):
+    # Load the model while the server starts, instead of on the first request
+    warm_up = start_warm_up(self.timeoff_agent.model)
+    # One MCP session for the life of the server, shared by all requests
+    async with self.timeoff_agent:
+      log_message(self.actor, "Timeoff agent started")
+      yield
+    warm_up.cancel()
+    log_message(self.actor, "Timeoff agent stopped")
     
+
+  def stream_agent(self, context: RequestContext, user_input: dict):
+    # The message id makes bookings idempotent when the same message is retried
+    request_id = context.message.message_id if context.message else None
+    return self.timeoff_agent.stream_request(user_input.get('user'), user_input.get('prompt'), request_id)
     
-  async def cancel(
-    self,
-    context: RequestContext, 
-    event_queue: EventQueue) -> None:
     
-    raise Exception("Not implemented")
-
-
-if __name__ == "__main__":
-
+#---------------------------------------------------------------------
+# ASGI Application
+#---------------------------------------------------------------------
+def build_app(url: str = "http://localhost:9002", mcp_server_url: str = "http://localhost:8000", model=None):
+  """Builds the A2A server app; called once per uvicorn worker process.
+
+  url is where clients reach the app, as published in the agent card, and
+  mcp_server_url is the timeoff MCP server it talks to. model replaces the
+  agent's own chat model, so a host can share one client.
+
+  Every worker keeps its own MCP session to the timeoff MCP server. Set
+  TIMEOFF_A2A_TASK_DB to keep tasks in a SQLite file shared by all workers
+  instead of in process memory. Either way, tasks are dropped after
+  A2A_TASK_TTL_SECONDS or beyond A2A_TASK_MAX_ENTRIES.
+  """
   timeoff_agent_skill = AgentSkill(
     id="TimeoffSkill",
     name="Timeoff Agent Skills",
@@ -72,7 +86,7 @@ if __name__ == "__main__":
   timeoff_agent_card = AgentCard(
     name="Timeoff Agent",
     description="Performs timeoff operations.",
-    url="http://localhost:9002",
+    url=url,
     version="1.0.0",
     defaultInputModes=["text"],
     defaultOutputModes=["text"],
@@ -80,9 +94,12 @@ if __name__ == "__main__":
     skills=[timeoff_agent_skill]
   )
 
+  timeoff_agent_executor = TimeoffAgentExecutor(mcp_server_url, model)
+
+  task_store = task_store_from_env(os.getenv("TIMEOFF_A2A_TASK_DB"))
   timeoff_agent_request_handler = DefaultRequestHandler(
-    agent_executor=TimeoffAgentExecutor(),
-    task_store=InMemoryTaskStore(),
+    agent_executor=timeoff_agent_executor,
+    task_store=task_store,
   )
 
   # Create ASGI Application
@@ -90,11 +107,28 @@ if __name__ == "__main__":
     agent_card=timeoff_agent_card,
     http_handler=timeoff_agent_request_handler
   )
+  return timeoff_server.build(lifespan=timeoff_agent_executor.lifespan,
+                              routes=[stats_route(timeoff_agent_executor, task_store), metrics_route()])
+
+
+if __name__ == "__main__":
+
+  parser = argparse.ArgumentParser(description="Timeoff A2A server.")
+  parser.add_argument("--workers", type=int, default=int(os.getenv("TIMEOFF_A2A_WORKERS", "1")),
+                      help="Worker processes serving port 9002 (default: $TIMEOFF_A2A_WORKERS or 1)")
+  args = parser.parse_args()
+
+  # Workers don't share memory, so with more than one the tasks go to a shared file
+  if args.workers > 1:
+    os.environ.setdefault("TIMEOFF_A2A_TASK_DB", "timeoff_a2a_tasks.db")
 
-  # Start ASGI server that hosts the Starlette application
+  # Start ASGI server that hosts the Starlette application.
+  # uvicorn imports the factory in every worker process it starts.
   import uvicorn
   uvicorn.run(
-    timeoff_server.build(),
+    "time_off_policy_a2a_wrapper_server:build_app",
+    factory=True,
+    workers=args.workers,
     host="0.0.0.0", 
     port=9002, 
     log_level="info")
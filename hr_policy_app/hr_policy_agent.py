@@ -1,14 +1,22 @@
 import asyncio
 import os
+import sys
+import time
 from dotenv import load_dotenv
 
 from mcp import ClientSession, StdioServerParameters
+from mcp.types import LoggingMessageNotificationParams
 from mcp.client.stdio import stdio_client
 
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_mcp_adapters.prompts import load_mcp_prompt
 from langgraph.prebuilt import create_react_agent
-from langchain_ollama import ChatOllama
+
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.agent_stream_utils import stream_agent_events
+from utils.model_utils import get_chat_model
+from utils.metrics import track_stage, observe_stage
 
 
 # - ----------------------------------------------------------------------
@@ -17,8 +25,8 @@ from langchain_ollama import ChatOllama
 load_dotenv()
 
 # chat wrapper is suitable for interct with model by assigning it a role and make it tool call aware
-model = ChatOllama(
-    model="llama3.1",  # or any other model you have installed
+model = get_chat_model(
+    "llama3.1",  # or any other model you have installed
     temperature=0.7)
 
 # - ----------------------------------------------------------------------
@@ -33,38 +41,65 @@ mcp_server_params = StdioServerParameters(
 )
 
 
+# Log messages of the mcp server carrying stage timings, see query_policies
+mcp_server_metrics_logger = "hr_policy.metrics"
+
+
+async def record_server_stage(params: LoggingMessageNotificationParams):
+    """Records a stage timed by the mcp server, e.g. its vector search, in this process's metrics."""
+    if params.logger != mcp_server_metrics_logger or not isinstance(params.data, dict):
+        return
+    extra = params.data.get("extra") or {}
+    if "stage" in extra and "seconds" in extra:
+        observe_stage(extra["stage"], float(extra["seconds"]))
+
+
 # - ----------------------------------------------------------------------
 # Run the agent
 # -----------------------------------------------------------------------
-async def run_hr_policy_agent(prompt: str) -> str:
-    
-    # create stdio mcp client
-    async with stdio_client(mcp_server_params) as client:
-        read, write = client
-        
-        # create mcp session
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-            
-            # load mcp tools and prompt
-            mcp_tools = await load_mcp_tools(session)
-            mcp_prompt = await load_mcp_prompt(session, 
-                                    "get_llm_prompt", 
-                                    arguments={"query": prompt})
-
-            print("\nTools loaded :", [tool.name for tool in mcp_tools])
-            print("\nPrompt loaded :", mcp_prompt)
+async def stream_hr_policy_agent(prompt: str, chat_model=None):
+    """Runs the agent and yields ("token" | "tool" | "final", text) events as it works.
+
+    chat_model replaces the module's model, e.g. to share one client between agents.
+    """
+
+    with track_stage("hr_policy.request"):
+        # create stdio mcp client
+        connect_started = time.perf_counter()
+        async with stdio_client(mcp_server_params) as client:
+            read, write = client
             
-            # create agent
-            agent = create_react_agent(model=model, tools=mcp_tools)
+            # create mcp session
+            async with ClientSession(read, write, logging_callback=record_server_stage) as session:
+                await session.initialize()
+                # Mostly the MCP server subprocess starting up and building its vector store
+                observe_stage("hr_policy.mcp_connect", time.perf_counter() - connect_started)
+                
+                # load mcp tools and prompt
+                with track_stage("hr_policy.tool_loading"):
+                    mcp_tools = await load_mcp_tools(session)
+                    mcp_prompt = await load_mcp_prompt(session, 
+                                            "get_llm_prompt", 
+                                            arguments={"query": prompt})
+
+                print("\nTools loaded :", [tool.name for tool in mcp_tools])
+                print("\nPrompt loaded :", mcp_prompt)
+                
+                # create agent
+                agent = create_react_agent(model=chat_model or model, tools=mcp_tools)
+
+                # run agent with prompt, streaming tokens and tool calls as they happen
+                async for event in stream_agent_events(agent, {"messages": mcp_prompt}):
+                    yield event
 
-            # invoke agent with prompt        
-            agent_response = await agent.ainvoke(
-                {"messages": mcp_prompt})
 
-            return agent_response["messages"][-1].content
+async def run_hr_policy_agent(prompt: str) -> str:
+    answer = "Error"  # should never stay this way
+    async for kind, text in stream_hr_policy_agent(prompt):
+        if kind == "final":
+            answer = text
+    return answer
 
-        return "Error"  # should never reach here
 
 if __name__ == "__main__":
     # Run the agent with a sample query
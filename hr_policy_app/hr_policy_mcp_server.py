@@ -1,6 +1,7 @@
 import sys
+import time
 from dotenv import load_dotenv
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
 from langchain_community.document_loaders import PyPDFLoader, pdf
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.vectorstores import InMemoryVectorStore
@@ -38,10 +39,19 @@ policy_vector_store = InMemoryVectorStore.from_documents(policy_document_context
 # -----------------------------------------------------------------------
 # Setup the MCP tool to query for policies, given a user query string
 # -----------------------------------------------------------------------
+# Logger of the log messages that carry stage timings to the agent, see hr_policy_agent.record_server_stage
+METRICS_LOGGER = "hr_policy.metrics"
+
 @mcp.tool()
-def query_policies(query: str):
+async def query_policies(query: str, ctx: Context):
     # perform a semantic search in the vector store
+    started = time.perf_counter()
     results = policy_vector_store.similarity_search(query, k=3)
+
+    # This server is a subprocess of the agent without a /metrics of its own, so
+    # the search time goes to the agent, which records it as a stage of its own
+    await ctx.log("similarity_search timed", level="info", logger_name=METRICS_LOGGER,
+                  extra={"stage": "hr_policy.similarity_search", "seconds": time.perf_counter() - started})
     return results
 
 
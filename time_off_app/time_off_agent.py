@@ -1,70 +1,348 @@
 import asyncio
+import os
+import sys
+import time
 from contextlib import AsyncExitStack
+from datetime import timedelta
 from dotenv import load_dotenv
 
-from langchain_ollama import ChatOllama
+import anyio
+import httpx
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
 from langgraph.prebuilt import create_react_agent
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_mcp_adapters.prompts import load_mcp_prompt
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+
+# Add the current directory to sys.path to allow imports when running as a module
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from time_off_intents import parse_simple_intent, format_balance_answer, format_request_answer
+
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.agent_stream_utils import stream_agent_events
+from utils.model_utils import get_chat_model
+from utils.metrics import track_stage, observe_stage
 
 load_dotenv()
 
+# Reconnect backoff when the MCP session drops: 0.5s, 1s, 2s, ... up to 30s
+RECONNECT_INITIAL_DELAY_SECONDS = 0.5
+RECONNECT_MAX_DELAY_SECONDS = 30.0
+# How long a request waits for the session to (re)connect before giving up
+CONNECT_TIMEOUT_SECONDS = 30.0
+# How long a call to the MCP server may go unanswered before the session is taken for dead
+READ_TIMEOUT_SECONDS = float(os.getenv("TIMEOFF_MCP_READ_TIMEOUT_SECONDS", "60"))
+
+# Errors that mean the MCP session itself is gone, not that one request failed
+SESSION_LOST_ERRORS = (
+    httpx.TransportError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+)
+
+
+def is_session_lost(error: BaseException) -> bool:
+    if isinstance(error, SESSION_LOST_ERRORS):
+        return True
+    # The server forgot our session, e.g. because it restarted, or stopped answering
+    return isinstance(error, McpError) and any(
+        reason in str(error).lower() for reason in ("session terminated", "timed out"))
+
+
+def request_idempotency_key(request_id: str, employee_name: str, start_date: str, total_days: int) -> str:
+    # The same booking retried for the same request maps to the same key, while
+    # one request that books two different ranges still gets two keys
+    return f"{request_id}:{employee_name}:{start_date}:{total_days}"
+
+
+def with_idempotency_key(tool: StructuredTool) -> StructuredTool:
+    """Hides request_timeoff's idempotency_key from the LLM and derives it from the request id instead."""
+    args_schema = dict(tool.args_schema)
+    args_schema["properties"] = {
+        name: schema for name, schema in args_schema.get("properties", {}).items() if name != "idempotency_key"
+    }
+
+    async def request_timeoff(config: RunnableConfig, **arguments):
+        arguments.pop("idempotency_key", None)
+        request_id = config.get("configurable", {}).get("request_id")
+        if request_id:
+            arguments["idempotency_key"] = request_idempotency_key(
+                request_id, arguments.get("employee_name"), arguments.get("start_date"), arguments.get("total_days"))
+        return await tool.coroutine(**arguments)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=args_schema,
+        coroutine=request_timeoff,
+        response_format=tool.response_format,
+        metadata=tool.metadata,
+    )
+
+
+def _tool_result_text(result) -> str:
+    return "".join(getattr(item, "text", "") for item in result.content)
+
+
+class WatchedClientSession(ClientSession):
+    """ClientSession that reports calls failing because the session is gone.
+
+    The agent's tools turn errors into tool messages for the LLM, so a
+    dropped session would otherwise go unnoticed until the next fast-path
+    request; on_session_lost(session) is called instead, wherever it fails.
+    """
+
+    def __init__(self, *args, on_session_lost, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_session_lost = on_session_lost
+
+    async def send_request(self, *args, **kwargs):
+        try:
+            return await super().send_request(*args, **kwargs)
+        except Exception as e:
+            if is_session_lost(e):
+                self.on_session_lost(self)
+            raise
+
+
 class TimeOffAgent:
-    def __init__(self, mcp_server_url: str = "http://localhost:8000", model_name: str = "llama3.1"):
+    """ReAct agent over the timeoff MCP server.
+
+    Entering the agent starts one long-lived MCP session that is shared by
+    all requests, including concurrent ones. The session is owned by a
+    background task, which reconnects with exponential backoff whenever the
+    connection drops; requests that hit a dropped session wait for the
+    reconnect and retry once.
+
+    Balance checks and well-formed "N days starting YYYY-MM-DD" requests
+    skip the LLM and call the MCP tool directly; everything else goes
+    through the ReAct agent.
+    """
+
+    def __init__(self, mcp_server_url: str = "http://localhost:8000", model_name: str = "llama3.1", model=None):
         self.mcp_server_url = mcp_server_url
-        self.model = ChatOllama(model=model_name)
-        self.model = ChatOllama(model=model_name)
-        # self.exit_stack is initialized in __aenter__
+        # A model passed in can be shared with other agents in the same process
+        self.model = model or get_chat_model(model_name)
+        # self.session and self.agent are set by the session task once connected
         self.session = None
         self.agent = None
+        self._session_task = None
+        self._closing = False
+        self._ready = asyncio.Event()
+        self._reconnect = asyncio.Event()
+        # Set once the current session is torn down, failing the calls still waiting on it
+        self._session_closed = asyncio.Event()
 
     async def __aenter__(self):
-        self.exit_stack = AsyncExitStack()
+        if self._session_task is None:
+            self._closing = False
+            self._session_task = asyncio.create_task(self._run_session())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._session_task is None:
+            return
+        self._closing = True
+        self._reconnect.set()
+        await self._session_task
+        self._session_task = None
+
+    async def _open_session(self, exit_stack: AsyncExitStack):
+        """Connects to the MCP server and builds the agent; returns (session, agent)."""
         # Connect to the MCP server
+        connect_started = time.perf_counter()
         client = streamablehttp_client(self.mcp_server_url)
-        read, write, _ = await self.exit_stack.enter_async_context(client)
+        read, write, _ = await exit_stack.enter_async_context(client)
 
         # Initialize the session
-        self.session = ClientSession(read, write)
-        await self.exit_stack.enter_async_context(self.session)
+        session = WatchedClientSession(read, write, read_timeout_seconds=timedelta(seconds=READ_TIMEOUT_SECONDS),
+                                       on_session_lost=self._request_reconnect)
+        await exit_stack.enter_async_context(session)
         print("Initializing session...")
-        await self.session.initialize()
+        await session.initialize()
+        observe_stage("timeoff.mcp_connect", time.perf_counter() - connect_started)
 
         # Load tools and create the agent
-        tools = await load_mcp_tools(self.session)
+        with track_stage("timeoff.tool_loading"):
+            tools = [
+                with_idempotency_key(tool) if tool.name == "request_timeoff" else tool
+                for tool in await load_mcp_tools(session)
+            ]
         print(f"\nTools loaded: {[t.name for t in tools]}")
-        
+
         print("\nCreating ReAct agent...")
-        self.agent = create_react_agent(self.model, tools)
-        
-        return self
+        return session, create_react_agent(self.model, tools)
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.exit_stack.aclose()
+    async def _run_session(self):
+        # The MCP transport must be entered and exited by the same task, so
+        # this task owns the connection for its whole life, across reconnects.
+        delay = RECONNECT_INITIAL_DELAY_SECONDS
+        while not self._closing:
+            closed = self._session_closed = asyncio.Event()
+            try:
+                async with AsyncExitStack() as exit_stack:
+                    self.session, self.agent = await self._open_session(exit_stack)
+
+                    delay = RECONNECT_INITIAL_DELAY_SECONDS
+                    self._reconnect.clear()
+                    self._ready.set()
+                    await self._reconnect.wait()
+            except Exception as e:
+                print(f"\nMCP session to {self.mcp_server_url} failed: {e}")
+            finally:
+                self._ready.clear()
+                self.session = None
+                # Closing the transport doesn't fail the calls still waiting on
+                # it, so they are failed here and retried on the next session
+                closed.set()
+
+            if self._closing:
+                break
+            print(f"\nReconnecting to MCP server in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY_SECONDS)
+
+    async def _connected(self):
+        """Waits for a live session; returns it, the agent built on it and the event set once it closes."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), CONNECT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"Could not connect to the MCP server at {self.mcp_server_url}")
+        return self.session, self.agent, self._session_closed
+
+    async def _until_closed(self, events, closed: asyncio.Event):
+        """Yields the events, raising ConnectionError if the session closes before they end.
+
+        The events are produced by a task of their own, so a call stuck on a
+        dropped session can be cancelled instead of waiting forever.
+        """
+        queue = asyncio.Queue(maxsize=1)
+        done = object()
+
+        async def produce():
+            try:
+                async for event in events:
+                    await queue.put(event)
+                await queue.put(done)
+            except Exception as e:
+                await queue.put(e)
 
-    async def submit_request(self, user: str, prompt: str) -> str:
-        """Process a query for a user using the agent."""
-        if not self.agent or not self.session:
+        producer = asyncio.create_task(produce())
+        closed_wait = asyncio.create_task(closed.wait())
+        next_event = None
+        try:
+            while True:
+                next_event = asyncio.create_task(queue.get())
+                await asyncio.wait({next_event, closed_wait}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_event.done():
+                    raise ConnectionError(f"MCP session to {self.mcp_server_url} closed during the request")
+                event = next_event.result()
+                if event is done:
+                    return
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        finally:
+            pending = [task for task in (producer, closed_wait, next_event) if task is not None]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _request_reconnect(self, session):
+        # Only the first request to notice a dead session triggers a reconnect
+        if self.session is session:
+            self._ready.clear()
+            self._reconnect.set()
+
+    async def _answer_simple_intent(self, session, user: str, intent: dict, request_id: str | None) -> str:
+        """Answers a fast-path intent with a single MCP tool call."""
+        if intent["intent"] == "balance":
+            result = await session.call_tool("get_timeoff_balance", {"employee_name": user})
+            return format_balance_answer(user, "" if result.isError else _tool_result_text(result))
+
+        arguments = {
+            "employee_name": user,
+            "start_date": intent["start_date"],
+            "total_days": intent["total_days"],
+        }
+        if request_id:
+            arguments["idempotency_key"] = request_idempotency_key(request_id, **arguments)
+        result = await session.call_tool("request_timeoff", arguments)
+        return format_request_answer(user, intent["start_date"], intent["total_days"],
+                                     _tool_result_text(result), result.isError)
+
+    async def stream_request(self, user: str, prompt: str, request_id: str | None = None):
+        """Process a query for a user, yielding ("token" | "tool" | "final", text) events as the agent works.
+
+        request_id identifies the incoming request, e.g. the A2A message id.
+        Bookings made while handling it get idempotency keys derived from it,
+        so a retried request never books the same time off twice. That also
+        makes it safe to rerun a request whose session dropped halfway; the
+        rerun streams its tokens again and ends with its own "final" event.
+        """
+        if self._session_task is None:
             raise RuntimeError("Agent not initialized. Use 'async with' context manager.")
 
+        with track_stage("timeoff.request"):
+            intent = parse_simple_intent(prompt)
+            for attempt in range(2):
+                session, agent, closed = await self._connected()
+                try:
+                    async for event in self._until_closed(
+                            self._attempt_events(session, agent, user, prompt, intent, request_id), closed):
+                        yield event
+                    return
+                except Exception as e:
+                    # Nothing to retry on once the agent is closing, e.g. on shutdown
+                    if attempt or self._closing or not is_session_lost(e):
+                        raise
+                    print(f"\nMCP session lost ({e}), reconnecting and retrying...")
+                    self._request_reconnect(session)
+
+    async def _attempt_events(self, session, agent, user: str, prompt: str, intent: dict | None,
+                              request_id: str | None):
+        """One attempt at a request on the given session, yielding its stream events."""
+        if intent:
+            print(f"\nFast path: {intent}")
+            with track_stage("timeoff.fast_path"):
+                answer = await self._answer_simple_intent(session, user, intent, request_id)
+            yield "final", answer
+            return
+
         # Load the prompt context from the MCP server
-        llm_prompt = await load_mcp_prompt(
-            self.session,
-            "get_llm_prompt",
-            arguments={"user": user, "prompt": prompt}
-        )
+        with track_stage("timeoff.prompt_loading"):
+            llm_prompt = await load_mcp_prompt(
+                session,
+                "get_llm_prompt",
+                arguments={"user": user, "prompt": prompt}
+            )
         print(f"\nPrompt loaded: {llm_prompt}")
-        
-        # Invoke the agent
-        response = await self.agent.ainvoke({"messages": llm_prompt})
-        return response["messages"][-1].content
+
+        # Run the agent, streaming its tokens and tool calls
+        async for event in stream_agent_events(agent, {"messages": llm_prompt},
+                                               config={"configurable": {"request_id": request_id}}):
+            yield event
+
+    async def submit_request(self, user: str, prompt: str, request_id: str | None = None) -> str:
+        """Process a query for a user using the agent and return the answer."""
+        answer = ""
+        async for kind, text in self.stream_request(user, prompt, request_id):
+            if kind == "final":
+                answer = text
+        return answer
+
 
 async def main():
     """Run multiple timeoff agent queries in sequence."""
     mcp_url = "http://localhost:8000"
-    
+
     try:
         async with TimeOffAgent(mcp_url) as agent:
             queries = [
@@ -79,9 +357,9 @@ async def main():
                 print("="*50)
                 response = await agent.submit_request(user, query_text)
                 print(f"\nResponse: {response}")
-                
+
     except Exception as e:
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+
+# Add project root and this folder to sys.path to find utils and the agent
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from utils.log_utils import log_message
+from time_off_agent import TimeOffAgent
+
+
+class TimeOffAgentTest:
+    """Test class for TimeOffAgent's handling of dropped MCP sessions"""
+
+    class MockSession:
+        """Answers balance calls, or hangs on them like a session whose server went away"""
+
+        def __init__(self, hang: bool):
+            self.hang = hang
+            self.calls = 0
+            self.call_started = asyncio.Event()
+            self.call_cancelled = False
+
+        async def call_tool(self, name, arguments):
+            self.calls += 1
+            self.call_started.set()
+            if self.hang:
+                try:
+                    await asyncio.Event().wait()
+                except asyncio.CancelledError:
+                    self.call_cancelled = True
+                    raise
+            return SimpleNamespace(content=[SimpleNamespace(text="10")], isError=False)
+
+
+    class MockTimeOffAgent(TimeOffAgent):
+        """Hands out the given sessions, one per (re)connect, instead of connecting to a server"""
+
+        def __init__(self, sessions):
+            super().__init__(model=object())
+            self.sessions = iter(sessions)
+
+        async def _open_session(self, exit_stack):
+            return next(self.sessions), None
+
+
+    async def test_server_drops_mid_call(self):
+        """A call in flight when the session drops should fail and be retried on the next session"""
+        dropped, live = self.MockSession(hang=True), self.MockSession(hang=False)
+        async with self.MockTimeOffAgent([dropped, live]) as agent:
+            request = asyncio.create_task(agent.submit_request("Alice", "What is my time off balance?"))
+            await asyncio.wait_for(dropped.call_started.wait(), 5)
+
+            # The server goes away mid-call, as the transport or the read timeout reports it
+            agent._request_reconnect(dropped)
+            answer = await asyncio.wait_for(request, 5)
+
+        assert dropped.call_cancelled, "Expected the call on the dropped session to be cancelled"
+        assert live.calls == 1, f"Expected the request to be retried once on the new session, got {live.calls}"
+        assert "10" in answer, f"Expected the balance from the new session, got {answer!r}"
+        log_message("Test", "✓ Dropped session assertions passed!")
+
+    async def test_close_fails_in_flight_calls(self):
+        """Closing the agent, e.g. on shutdown, should fail calls in flight instead of waiting on them"""
+        dropped = self.MockSession(hang=True)
+        agent = self.MockTimeOffAgent([dropped])
+        await agent.__aenter__()
+        request = asyncio.create_task(agent.submit_request("Alice", "What is my time off balance?"))
+        await asyncio.wait_for(dropped.call_started.wait(), 5)
+
+        await asyncio.wait_for(agent.__aexit__(None, None, None), 5)
+        try:
+            await asyncio.wait_for(request, 5)
+            assert False, "Expected the request to fail once the agent closed"
+        except ConnectionError:
+            pass
+        assert dropped.call_cancelled, "Expected the call in flight to be cancelled"
+        log_message("Test", "✓ Shutdown assertions passed!")
+
+
+if __name__ == "__main__":
+    # Run the tests
+    test_suite = TimeOffAgentTest()
+    asyncio.run(test_suite.test_server_drops_mid_call())
+    asyncio.run(test_suite.test_close_fails_in_flight_calls())
@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to sys.path to allow imports when running as a module
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from time_off_storage import open_timeoff_storage
+
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.metrics import track_stage
+
+
+DEFAULT_MAX_PENDING = 64
+
+
+def _timed(method, *args, **kwargs):
+    with track_stage(f"sqlite.{method.__name__}"):
+        return method(*args, **kwargs)
+
+
+class AsyncTimeOffDatastore:
+    """Async front for a TimeOffStorage backend.
+
+    Every query runs on a dedicated DB executor, so an event loop awaiting
+    these methods never blocks on SQLite I/O. A single-file datastore gets
+    one DB thread, which owns its connection; a sharded one gets a thread
+    per shard. At most max_pending calls are queued for the executor at a
+    time; further callers wait for a free slot instead of piling unbounded
+    work onto it.
+    """
+
+    def __init__(self, db_path=":memory:", max_pending=DEFAULT_MAX_PENDING, shards=1, **datastore_kwargs):
+        self._executor = ThreadPoolExecutor(max_workers=shards, thread_name_prefix="timeoff-db")
+        self._slots = asyncio.Semaphore(max_pending)
+        self.max_pending = max_pending
+        self.pending = 0
+        # sqlite3 connections belong to the thread that opened them
+        self._datastore = self._executor.submit(
+            open_timeoff_storage, db_path, shards, **datastore_kwargs).result()
+
+
+    async def _run(self, method, *args, **kwargs):
+        # datastore.* includes the wait for a slot and the DB thread; sqlite.* is the query alone
+        with track_stage(f"datastore.{method.__name__}"):
+            async with self._slots:
+                self.pending += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(
+                        self._executor, functools.partial(_timed, method, *args, **kwargs))
+                finally:
+                    self.pending -= 1
+
+
+    async def get_timeoff_balance(self, employee_name):
+        return await self._run(self._datastore.get_timeoff_balance, employee_name)
+
+
+    async def get_timeoff_balances(self, employee_names):
+        return await self._run(self._datastore.get_timeoff_balances, employee_names)
+
+
+    async def add_timeoff_request(self, employee_name, start_day, total_days, idempotency_key=None):
+        return await self._run(self._datastore.add_timeoff_request,
+                               employee_name, start_day, total_days, idempotency_key)
+
+
+    async def get_timeoff_history(self, employee_name, from_day=None, to_day=None, limit=20, cursor=None):
+        return await self._run(self._datastore.get_timeoff_history,
+                               employee_name, from_day, to_day, limit, cursor)
+
+
+    async def get_absences(self, from_day, to_day=None, include_names=True):
+        return await self._run(self._datastore.get_absences, from_day, to_day, include_names)
+
+
+    async def bulk_import_employees(self, rows, **kwargs):
+        return await self._run(self._datastore.bulk_import_employees, rows, **kwargs)
+
+
+    async def bulk_import_timeoff_history(self, rows, **kwargs):
+        return await self._run(self._datastore.bulk_import_timeoff_history, rows, **kwargs)
+
+
+    async def balance_cache_stats(self):
+        return await self._run(self._datastore.balance_cache_stats)
+
+
+    def close(self):
+        self._executor.submit(self._datastore.close).result()
+        self._executor.shutdown()
@@ -0,0 +1,422 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from datetime import date, timedelta
+
+# Add the current directory to sys.path to allow imports when running as a module
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from time_off_datastore import TimeOffDatastore
+from time_off_sharded_datastore import ShardedTimeOffDatastore
+from time_off_storage import open_timeoff_storage
+from time_off_async_datastore import AsyncTimeOffDatastore
+
+
+HISTORY_EPOCH = date(1800, 1, 1)
+# Synthetic history runs forward from here; benchmark bookings land after it
+SYNTHETIC_HISTORY_START = date(2000, 1, 1)
+SYNTHETIC_BOOKING_START = date(2100, 1, 1)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+#-----------------------------------------------------------------------
+# Synthetic data
+#-----------------------------------------------------------------------
+def disjoint_history(employee_name, size):
+    """One-day bookings on every other day from HISTORY_EPOCH, leaving a free day between each."""
+    for i in range(size):
+        yield {
+            "employee_name": employee_name,
+            "start_day": (HISTORY_EPOCH + timedelta(days=2 * i)).isoformat(),
+            "total_days": 1,
+        }
+
+
+def synthetic_employees(count, allowed_days=100_000):
+    for i in range(count):
+        yield {"name": f"Employee {i}", "allowed_days": allowed_days, "consumed_days": 0}
+
+
+def synthetic_history(employee_count, records_per_employee):
+    """records_per_employee two-day bookings per employee, three days apart."""
+    for record in range(records_per_employee):
+        start_day = (SYNTHETIC_HISTORY_START + timedelta(days=3 * record)).isoformat()
+        for i in range(employee_count):
+            yield {"employee_name": f"Employee {i}", "start_day": start_day, "total_days": 2}
+
+
+def load_synthetic_data(db_path, employees, history_per_employee, shards=1):
+    storage = open_timeoff_storage(db_path, shards)
+    employee_stats = storage.bulk_import_employees(synthetic_employees(employees))
+    history_stats = storage.bulk_import_timeoff_history(synthetic_history(employees, history_per_employee))
+    storage.close()
+    return {"employees": employee_stats, "history": history_stats}
+
+
+def percentile(sorted_values, fraction):
+    # nearest-rank percentile of an already sorted list
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies, errors, seconds):
+    ordered = sorted(latencies)
+    to_ms = lambda value: round(value * 1000, 3)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "ops_per_sec": round(len(ordered) / seconds, 1) if seconds > 0 else 0.0,
+        "p50_ms": to_ms(percentile(ordered, 0.50)) if ordered else None,
+        "p90_ms": to_ms(percentile(ordered, 0.90)) if ordered else None,
+        "p99_ms": to_ms(percentile(ordered, 0.99)) if ordered else None,
+        "max_ms": to_ms(ordered[-1]) if ordered else None,
+    }
+
+
+class MixedWorkload:
+    """Seeded stream of timeoff operations, read_ratio of them reads.
+
+    Reads are 80% single balance lookups, 10% history pages and 10% one-week
+    absence queries. Writes are one-day bookings on days no other booking of
+    that employee uses, so they exercise the full booking path rather than
+    being rejected up front.
+    """
+
+    def __init__(self, employee_count, read_ratio, seed=7):
+        self.employee_count = employee_count
+        self.read_ratio = read_ratio
+        self.rng = random.Random(seed)
+        self.next_booking = defaultdict(int)
+
+    def next_operation(self):
+        employee_name = f"Employee {self.rng.randrange(self.employee_count)}"
+        if self.rng.random() >= self.read_ratio:
+            booking = self.next_booking[employee_name]
+            self.next_booking[employee_name] += 1
+            start_day = (SYNTHETIC_BOOKING_START + timedelta(days=2 * booking)).isoformat()
+            return "request_timeoff", {"employee_name": employee_name, "start_date": start_day, "total_days": 1}
+
+        read = self.rng.random()
+        if read < 0.8:
+            return "get_timeoff_balance", {"employee_name": employee_name}
+        if read < 0.9:
+            return "get_timeoff_history", {"employee_name": employee_name, "limit": 20}
+        week_start = SYNTHETIC_HISTORY_START + timedelta(days=7 * self.rng.randrange(52))
+        return "get_absences", {"from_date": week_start.isoformat(),
+                                "to_date": (week_start + timedelta(days=6)).isoformat(),
+                                "include_names": False}
+
+
+async def run_workload(call, workload, operations, concurrency):
+    """Runs `operations` workload operations through call(name, arguments, worker_index)
+    from `concurrency` concurrent workers; reports throughput and latency percentiles."""
+    latencies = defaultdict(list)
+    errors = Counter()
+    remaining = operations
+
+    async def worker(worker_index):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            name, arguments = workload.next_operation()
+            started = time.perf_counter()
+            try:
+                await call(name, arguments, worker_index)
+            except Exception:
+                errors[name] += 1
+            latencies[name].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    return {
+        "seconds": round(seconds, 3),
+        "overall": latency_summary([value for values in latencies.values() for value in values],
+                                   sum(errors.values()), seconds),
+        "by_operation": {name: latency_summary(values, errors[name], seconds)
+                         for name, values in sorted(latencies.items())},
+    }
+
+
+async def benchmark_direct(db_path, shards, workload, operations, concurrency):
+    """Drives the workload against AsyncTimeOffDatastore, the MCP server's storage path."""
+    timeoff_db = AsyncTimeOffDatastore(db_path, shards=shards)
+    calls = {
+        "get_timeoff_balance": lambda a: timeoff_db.get_timeoff_balance(a["employee_name"]),
+        "get_timeoff_history": lambda a: timeoff_db.get_timeoff_history(a["employee_name"], limit=a["limit"]),
+        "get_absences": lambda a: timeoff_db.get_absences(a["from_date"], a["to_date"], a["include_names"]),
+        "request_timeoff": lambda a: timeoff_db.add_timeoff_request(
+            a["employee_name"], a["start_date"], a["total_days"]),
+    }
+    try:
+        report = await run_workload(lambda name, arguments, _: calls[name](arguments),
+                                    workload, operations, concurrency)
+        report["balance_cache"] = await timeoff_db.balance_cache_stats()
+        return report
+    finally:
+        timeoff_db.close()
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("localhost", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Nothing listening on port {port} after {timeout} seconds")
+
+
+def start_mcp_server(db_path, shards, port, extra_args=()):
+    """Starts time_off_mcp_server serving db_path on port; returns the process."""
+    env = {**os.environ,
+           "TIMEOFF_DB_PATH": db_path,
+           "TIMEOFF_DB_SHARDS": str(shards),
+           "TIMEOFF_MCP_PORT": str(port),
+           "TIMEOFF_MCP_LOG_LEVEL": "warning"}
+    process = subprocess.Popen([sys.executable, "-m", "time_off_app.time_off_mcp_server", *extra_args],
+                               cwd=REPO_ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+    except TimeoutError:
+        process.terminate()
+        raise
+    return process
+
+
+async def benchmark_mcp(url, workload, operations, concurrency):
+    """Drives the workload through the MCP tools over streamable HTTP, one client session per worker."""
+    from fastmcp import Client
+
+    async with AsyncExitStack() as exit_stack:
+        clients = [await exit_stack.enter_async_context(Client(url)) for _ in range(concurrency)]
+
+        async def call(name, arguments, worker_index):
+            await clients[worker_index].call_tool(name, arguments)
+
+        return await run_workload(call, workload, operations, concurrency)
+
+
+def benchmark_mixed(target, employees, history_per_employee, operations, concurrency,
+                    read_ratio, shards=1, port=8765, url=None, seed=7, workers=1):
+    """Loads synthetic data at the given scale, then runs a mixed workload
+    directly against the datastore or through the MCP tools."""
+    workload = MixedWorkload(employees, read_ratio, seed)
+    report = {
+        "target": target,
+        "employees": employees,
+        "history_per_employee": history_per_employee,
+        "operations": operations,
+        "concurrency": concurrency,
+        "read_ratio": read_ratio,
+        "shards": shards,
+    }
+    if target == "mcp" and not url:
+        report["workers"] = workers
+    if url:
+        # An already running server brings its own data
+        report.update(asyncio.run(benchmark_mcp(url, workload, operations, concurrency)))
+        return report
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "timeoff.db")
+        report["load"] = load_synthetic_data(db_path, employees, history_per_employee, shards)
+        if target == "direct":
+            report.update(asyncio.run(benchmark_direct(db_path, shards, workload, operations, concurrency)))
+        else:
+            server = start_mcp_server(db_path, shards, port, ["--workers", str(workers)])
+            try:
+                report.update(asyncio.run(
+                    benchmark_mcp(f"http://localhost:{port}/", workload, operations, concurrency)))
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+    return report
+
+
+def benchmark_mcp_workers(worker_counts, employees, history_per_employee, operations, concurrency,
+                          read_ratio, shards=1, port=8765):
+    """Runs the mixed workload through the MCP tools once per worker count,
+    each time against a freshly loaded database; speedup is relative to the first count."""
+    results = []
+    for workers in worker_counts:
+        report = benchmark_mixed("mcp", employees, history_per_employee, operations, concurrency,
+                                 read_ratio, shards, port, workers=workers)
+        results.append(report)
+        print(f"{workers} worker(s): {report['overall']['ops_per_sec']} ops/sec", file=sys.stderr)
+    baseline = results[0]["overall"]["ops_per_sec"]
+    for report in results:
+        report["speedup"] = round(report["overall"]["ops_per_sec"] / baseline, 2) if baseline else None
+    return results
+
+
+def per_op_microseconds(operation, arguments):
+    started = time.perf_counter()
+    for argument in arguments:
+        operation(argument)
+    return round((time.perf_counter() - started) / len(arguments) * 1_000_000, 2)
+
+
+#-----------------------------------------------------------------------
+# Benchmarks
+#-----------------------------------------------------------------------
+def benchmark_overlap_check(history_sizes, requests=2000, seed=7):
+    """Cost of overlap checking per booking as one employee's history grows.
+
+    For each size, times booking requests that overlap an existing record
+    (rejected) and requests that land in a free day (accepted), next to a
+    naive query that scans every earlier record for an overlap.
+    """
+    rng = random.Random(seed)
+    results = []
+    for size in history_sizes:
+        db = TimeOffDatastore()
+        db.bulk_import_employees([{"name": "Bench", "allowed_days": 10**9}])
+        db.bulk_import_timeoff_history(disjoint_history("Bench", size))
+        employee_id = db.conn.execute("SELECT id FROM employee WHERE name = 'Bench'").fetchone()[0]
+
+        booked_days = [(HISTORY_EPOCH + timedelta(days=2 * rng.randrange(size))).isoformat()
+                       for _ in range(requests)]
+        free_days = [(HISTORY_EPOCH + timedelta(days=2 * i + 1)).isoformat()
+                     for i in rng.sample(range(size), min(requests, size))]
+
+        def reject(start_day):
+            try:
+                db.add_timeoff_request("Bench", start_day, 1)
+            except ValueError:
+                pass
+
+        def naive_scan(start_day):
+            db.conn.execute('''
+                SELECT 1 FROM timeoff_history
+                WHERE employee_id = ? AND start_day <= ? AND end_day >= ?
+            ''', (employee_id, start_day, start_day)).fetchall()
+
+        results.append({
+            "history_size": size,
+            "rejected_overlap_us": per_op_microseconds(reject, booked_days),
+            "accepted_booking_us": per_op_microseconds(
+                lambda start_day: db.add_timeoff_request("Bench", start_day, 1), free_days),
+            "naive_scan_us": per_op_microseconds(naive_scan, booked_days[:200]),
+        })
+    return results
+
+
+def benchmark_sharded_writes(shard_counts, writers=8, employees=800, bookings_per_employee=5):
+    """Booking throughput of file-backed storage with 1 shard (a single file
+    behind one lock) versus several, with `writers` threads booking
+    concurrently for disjoint sets of employees."""
+    results = []
+    for shard_count in shard_counts:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = ShardedTimeOffDatastore(os.path.join(tmp_dir, "timeoff.db"), shard_count)
+            db.bulk_import_employees(
+                {"name": f"Employee {i}", "allowed_days": bookings_per_employee} for i in range(employees))
+
+            def book(writer_index):
+                for i in range(bookings_per_employee):
+                    start_day = (date(2026, 1, 1) + timedelta(days=2 * i)).isoformat()
+                    for employee in range(writer_index, employees, writers):
+                        db.add_timeoff_request(f"Employee {employee}", start_day, 1)
+
+            threads = [threading.Thread(target=book, args=(i,)) for i in range(writers)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            db.close()
+
+        bookings = employees * bookings_per_employee
+        results.append({
+            "shards": shard_count,
+            "writers": writers,
+            "bookings": bookings,
+            "seconds": round(elapsed, 3),
+            "bookings_per_sec": round(bookings / elapsed),
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the timeoff datastore and MCP server.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    overlap_parser = subparsers.add_parser(
+        "overlap", help="Overlap check cost per booking as history grows")
+    overlap_parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000],
+                                help="History sizes (records for one employee) to measure")
+    overlap_parser.add_argument("--requests", type=int, default=2000,
+                                help="Booking requests timed per size")
+
+    sharding_parser = subparsers.add_parser(
+        "sharding", help="Booking throughput of a single SQLite file versus sharded files")
+    sharding_parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8],
+                                 help="Shard counts to compare (1 is the single-file baseline)")
+    sharding_parser.add_argument("--writers", type=int, default=8, help="Concurrent writer threads")
+    sharding_parser.add_argument("--employees", type=int, default=800)
+    sharding_parser.add_argument("--bookings-per-employee", type=int, default=5)
+
+    mixed_parser = subparsers.add_parser(
+        "mixed", help="Mixed read/write workload against the datastore or the MCP tools")
+    mixed_parser.add_argument("--target", choices=["direct", "mcp"], default="direct",
+                              help="direct: AsyncTimeOffDatastore; mcp: MCP tools over streamable HTTP")
+    mixed_parser.add_argument("--employees", type=int, default=10_000)
+    mixed_parser.add_argument("--history-per-employee", type=int, default=20)
+    mixed_parser.add_argument("--operations", type=int, default=20_000)
+    mixed_parser.add_argument("--concurrency", type=int, default=16)
+    mixed_parser.add_argument("--read-ratio", type=float, default=0.9)
+    mixed_parser.add_argument("--shards", type=int, default=1)
+    mixed_parser.add_argument("--port", type=int, default=8765,
+                              help="Port for the MCP server the benchmark starts (mcp target)")
+    mixed_parser.add_argument("--url",
+                              help="Benchmark an already running MCP server instead of starting one")
+
+    workers_parser = subparsers.add_parser(
+        "workers", help="MCP tool throughput as the MCP server runs more worker processes")
+    workers_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4],
+                                help="Worker counts to compare (1 is the single-process baseline)")
+    workers_parser.add_argument("--employees", type=int, default=10_000)
+    workers_parser.add_argument("--history-per-employee", type=int, default=20)
+    workers_parser.add_argument("--operations", type=int, default=20_000)
+    workers_parser.add_argument("--concurrency", type=int, default=32)
+    workers_parser.add_argument("--read-ratio", type=float, default=0.9)
+    workers_parser.add_argument("--shards", type=int, default=1)
+    workers_parser.add_argument("--port", type=int, default=8765,
+                                help="Port for the MCP server the benchmark starts")
+
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+
+    args = parser.parse_args(argv)
+    if args.benchmark == "mixed":
+        results = benchmark_mixed(args.target, args.employees, args.history_per_employee, args.operations,
+                                  args.concurrency, args.read_ratio, args.shards, args.port, args.url)
+    elif args.benchmark == "workers":
+        results = benchmark_mcp_workers(args.workers, args.employees, args.history_per_employee, args.operations,
+                                        args.concurrency, args.read_ratio, args.shards, args.port)
+    elif args.benchmark == "overlap":
+        results = benchmark_overlap_check(args.sizes, args.requests)
+    elif args.benchmark == "sharding":
+        results = benchmark_sharded_writes(args.shards, args.writers, args.employees, args.bookings_per_employee)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+# Add the current directory to sys.path to allow imports when running as a module
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from time_off_datastore import IMPORT_BATCH_SIZE
+from time_off_storage import open_timeoff_storage
+
+
+#-----------------------------------------------------------------------
+# Streaming readers for HRIS exports
+#-----------------------------------------------------------------------
+def read_csv_rows(path):
+    """Yields one dict per CSV row, using the header row as keys."""
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+def read_jsonl_rows(path):
+    """Yields one dict per non-empty JSON line."""
+    with open(path, encoding="utf-8") as jsonl_file:
+        for line in jsonl_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_rows(path):
+    """Picks the reader from the file extension (.csv, .jsonl or .ndjson)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return read_csv_rows(path)
+    if extension in (".jsonl", ".ndjson"):
+        return read_jsonl_rows(path)
+    raise ValueError(f"Unsupported import file type: {path} (expected .csv or .jsonl)")
+
+
+#-----------------------------------------------------------------------
+# Import entry point
+#-----------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Bulk import employees and timeoff history into the timeoff datastore.")
+    parser.add_argument("--db", default=os.getenv("TIMEOFF_DB_PATH", "timeoff.db"),
+                        help="SQLite database file (default: $TIMEOFF_DB_PATH or timeoff.db)")
+    parser.add_argument("--shards", type=int, default=int(os.getenv("TIMEOFF_DB_SHARDS", "1")),
+                        help="Number of SQLite shard files (default: $TIMEOFF_DB_SHARDS or 1)")
+    parser.add_argument("--employees", help="CSV/JSONL file with name, allowed_days, consumed_days")
+    parser.add_argument("--history", help="CSV/JSONL file with employee_name, start_day, total_days")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+                        help="Rows per executemany transaction")
+    args = parser.parse_args(argv)
+
+    if not args.employees and not args.history:
+        parser.error("nothing to import: pass --employees and/or --history")
+
+    timeoff_db = open_timeoff_storage(args.db, args.shards)
+
+    # Employees go first so history rows can resolve employee names
+    if args.employees:
+        stats = timeoff_db.bulk_import_employees(read_rows(args.employees), args.batch_size)
+        print(f"Imported employees from {args.employees}: {json.dumps(stats)}")
+    if args.history:
+        stats = timeoff_db.bulk_import_timeoff_history(read_rows(args.history), args.batch_size)
+        print(f"Imported timeoff history from {args.history}: {json.dumps(stats)}")
+    timeoff_db.close()
+
+
+if __name__ == "__main__":
+    main()
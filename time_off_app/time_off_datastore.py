@@ -1,14 +1,136 @@
+import itertools
 import sqlite3
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+
+MAX_HISTORY_PAGE_SIZE = 500
+IMPORT_BATCH_SIZE = 50_000
+BUSY_TIMEOUT_SECONDS = 30
+DEFAULT_BALANCE_CACHE_SIZE = 10_000
+# Stays well under SQLite's limit on bound parameters per statement
+MAX_NAMES_PER_QUERY = 500
+MAX_ABSENCE_RANGE_DAYS = 366
+
+# (name, allowed_days, consumed_days) of the demo employees
+SEED_EMPLOYEES = [
+    ("Alice", 20, 5),
+    ("Bob", 15, 3),
+    ("Charlie", 25, 10)
+]
+
+
+def encode_history_cursor(start_day, history_id):
+    return f"{start_day}|{history_id}"
+
+
+def decode_history_cursor(cursor):
+    try:
+        start_day, history_id = cursor.rsplit("|", 1)
+        return start_day, int(history_id)
+    except ValueError:
+        raise ValueError(f"Invalid history cursor: {cursor}")
+
+
+def normalize_day(day):
+    """Validates a day and returns it as YYYY-MM-DD, the format stored and compared in SQL."""
+    try:
+        return date.fromisoformat(day).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid day {day}, expected YYYY-MM-DD")
+
+
+def end_day_of(start_day, total_days):
+    """Last day (inclusive) of a timeoff starting on start_day, as YYYY-MM-DD."""
+    return (date.fromisoformat(start_day) + timedelta(days=total_days - 1)).isoformat()
+
+
+def booking_message(employee_name, total_days):
+    return f"Successfully added timeoff request for {total_days} days for employee {employee_name}"
+
+
+def import_stats(imported, skipped, seconds):
+    return {
+        "rows_imported": imported,
+        "rows_skipped": skipped,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(imported / seconds) if seconds > 0 else imported,
+    }
+
+
+class BalanceCache:
+    """Bounded LRU map of employee name to remaining timeoff days."""
+
+    def __init__(self, max_size=DEFAULT_BALANCE_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, employee_name):
+        balance = self.entries.get(employee_name)
+        if balance is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(employee_name)
+        self.hits += 1
+        return balance
+
+    def put(self, employee_name, balance):
+        if self.max_size <= 0:
+            return
+        self.entries[employee_name] = balance
+        self.entries.move_to_end(employee_name)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def refresh(self, employee_name, balance):
+        # Only updates names already cached, so bulk writes don't flush the working set
+        if employee_name in self.entries:
+            self.entries[employee_name] = balance
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
 
 
 class TimeOffDatastore:
 
 
-    def __init__(self, db_path=":memory:"):
+    def __init__(self, db_path=":memory:", balance_cache_size=DEFAULT_BALANCE_CACHE_SIZE,
+                 verify_balance_cache=False, seed=True, check_same_thread=True, shared_writers=False):
+        # Balances are cached write-through, which assumes this datastore is
+        # the only writer to db_path. Pass shared_writers=True when other
+        # processes write to it too: the cache is then dropped whenever one of
+        # them has committed since the last read. verify_balance_cache
+        # re-checks every cache hit against the database and is meant for tests.
+        self.balance_cache = BalanceCache(balance_cache_size)
+        self.verify_balance_cache = verify_balance_cache
+        self.shared_writers = shared_writers
+        self.data_version = None
+
         # Initialize the database connection
-        self.conn = sqlite3.connect(db_path)
+        self.conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SECONDS,
+                                    check_same_thread=check_same_thread)
+        if db_path != ":memory:":
+            # Let readers proceed while a booking holds the write lock
+            self.conn.execute('PRAGMA journal_mode=WAL')
         self.create_tables()
-        self.seed_data()
+        if seed:
+            self.seed_data()
         
 
     def create_tables(self):
@@ -29,31 +151,164 @@ class TimeOffDatastore:
                 employee_id INTEGER NOT NULL,
                 start_day TEXT NOT NULL,
                 total_days INTEGER NOT NULL,
+                end_day TEXT NOT NULL,
+                idempotency_key TEXT,
                 FOREIGN KEY(employee_id) REFERENCES employee(id)
             )
         ''')
-        
+
+        self.conn.commit()
+        self.migrate_history_end_day()
+        self.migrate_history_idempotency_key()
+        self.create_absence_table()
+        self.create_indexes()
+
+
+    def create_absence_table(self):
+        # One row per employee per day off, so "who is out" is a primary key range lookup
+        is_new = not self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'timeoff_absence'").fetchone()
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS timeoff_absence (
+                day TEXT NOT NULL,
+                employee_id INTEGER NOT NULL,
+                PRIMARY KEY (day, employee_id),
+                FOREIGN KEY(employee_id) REFERENCES employee(id)
+            ) WITHOUT ROWID
+        ''')
+        self.conn.commit()
+        if is_new:
+            # Databases created before the table existed get it backfilled once
+            self._expand_absences_after(0)
+
+
+    def _expand_absences_after(self, history_id):
+        # Materializes the absence days of every history row with id > history_id
+        self.conn.execute('''
+            WITH RECURSIVE absence_day(employee_id, day, end_day) AS (
+                SELECT employee_id, start_day, end_day FROM timeoff_history WHERE id > ?
+                UNION ALL
+                SELECT employee_id, date(day, '+1 day'), end_day FROM absence_day WHERE day < end_day
+            )
+            INSERT OR IGNORE INTO timeoff_absence (day, employee_id)
+            SELECT day, employee_id FROM absence_day
+        ''', (history_id,))
         self.conn.commit()
 
 
-    def seed_data(self):
+    def migrate_history_end_day(self):
+        # Databases created before end_day was stored get it backfilled once
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(timeoff_history)')]
+        if "end_day" in columns:
+            return
         cursor = self.conn.cursor()
-        employees = [
-            ("Alice", 20, 5),
-            ("Bob", 15, 3),
-            ("Charlie", 25, 10)
-        ]
+        cursor.execute("ALTER TABLE timeoff_history ADD COLUMN end_day TEXT NOT NULL DEFAULT ''")
+        cursor.execute('''
+            UPDATE timeoff_history SET end_day = date(start_day, '+' || (total_days - 1) || ' days')
+        ''')
+        self.conn.commit()
 
-        for name, allowed, consumed in employees:
-            cursor.execute('''
-                INSERT OR IGNORE INTO employee (name, allowed_days, consumed_days)
-                VALUES (?, ?, ?)
-            ''', (name, allowed, consumed))
 
+    def migrate_history_idempotency_key(self):
+        # Databases created before bookings carried an idempotency key get the column once
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(timeoff_history)')]
+        if "idempotency_key" not in columns:
+            self.conn.execute('ALTER TABLE timeoff_history ADD COLUMN idempotency_key TEXT')
+
+        # Not one of the droppable bulk import indexes: it enforces uniqueness.
+        # Partial, so bookings without a key cost nothing to index.
+        self.conn.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_timeoff_history_idempotency_key
+            ON timeoff_history (idempotency_key) WHERE idempotency_key IS NOT NULL
+        ''')
         self.conn.commit()
 
 
+    def create_indexes(self):
+        cursor = self.conn.cursor()
+
+        # Serves per-employee history lookups as an index range scan
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_timeoff_history_employee_start
+            ON timeoff_history (employee_id, start_day)
+        ''')
+
+        self.conn.commit()
+
+
+    def drop_indexes(self):
+        cursor = self.conn.cursor()
+        cursor.execute('DROP INDEX IF EXISTS idx_timeoff_history_employee_start')
+        self.conn.commit()
+
+
+    def seed_data(self, employees=SEED_EMPLOYEES):
+        cursor = self.conn.cursor()
+        cursor.executemany('''
+            INSERT OR IGNORE INTO employee (name, allowed_days, consumed_days)
+            VALUES (?, ?, ?)
+        ''', employees)
+
+        self.conn.commit()
+
+
+    def _sync_balance_cache(self):
+        if not self.shared_writers:
+            return
+        # data_version changes only when another connection commits to the database
+        data_version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version != self.data_version:
+            self.balance_cache.clear()
+            self.data_version = data_version
+
+
     def get_timeoff_balance(self, employee_name):
+        self._sync_balance_cache()
+        balance = self.balance_cache.get(employee_name)
+        if balance is not None:
+            if self.verify_balance_cache:
+                self._verify_cached_balance(employee_name, balance)
+            return balance
+
+        balance = self._query_timeoff_balance(employee_name)
+        if balance is not None:
+            self.balance_cache.put(employee_name, balance)
+        return balance
+
+
+    def get_timeoff_balances(self, employee_names):
+        """Returns {employee_name: balance} for all the names, None for unknown ones.
+
+        Cached balances are used as-is; the rest are fetched with one
+        IN (...) query per MAX_NAMES_PER_QUERY names.
+        """
+        self._sync_balance_cache()
+        balances = {}
+        uncached_names = []
+        for employee_name in dict.fromkeys(employee_names):
+            balance = self.balance_cache.get(employee_name)
+            if balance is None:
+                uncached_names.append(employee_name)
+                continue
+            if self.verify_balance_cache:
+                self._verify_cached_balance(employee_name, balance)
+            balances[employee_name] = balance
+
+        cursor = self.conn.cursor()
+        for names in itertools.batched(uncached_names, MAX_NAMES_PER_QUERY):
+            placeholders = ", ".join("?" * len(names))
+            cursor.execute(f'''
+                SELECT name, allowed_days - consumed_days FROM employee WHERE name IN ({placeholders})
+            ''', names)
+            for employee_name, balance in cursor.fetchall():
+                balances[employee_name] = balance
+                self.balance_cache.put(employee_name, balance)
+
+        # keep the caller's order and report unknown names explicitly
+        return {employee_name: balances.get(employee_name) for employee_name in employee_names}
+
+
+    def _query_timeoff_balance(self, employee_name):
         cursor = self.conn.cursor()
         cursor.execute('''
             SELECT allowed_days, consumed_days FROM employee WHERE name = ?
@@ -67,32 +322,363 @@ class TimeOffDatastore:
             return None
 
 
-    def add_timeoff_request(self, employee_name, start_day, total_days):
+    def _verify_cached_balance(self, employee_name, cached_balance):
+        stored_balance = self._query_timeoff_balance(employee_name)
+        if stored_balance != cached_balance:
+            raise RuntimeError(f"Balance cache is stale for {employee_name}: cached {cached_balance}, stored {stored_balance}")
+
+
+    def check_balance_cache(self):
+        """Returns the names whose cached balance disagrees with the database."""
+        return [
+            employee_name
+            for employee_name, cached_balance in list(self.balance_cache.entries.items())
+            if self._query_timeoff_balance(employee_name) != cached_balance
+        ]
+
+
+    def balance_cache_stats(self):
+        return self.balance_cache.stats()
+
+
+    def add_timeoff_request(self, employee_name, start_day, total_days, idempotency_key=None):
+        """Books the time off and consumes the days from the employee's balance.
+
+        A request carrying an idempotency_key that was already booked returns
+        the original result from an index lookup instead of booking again.
+        """
+        if total_days < 1:
+            raise ValueError(f"Time off request must be for at least 1 day (requested {total_days} days)")
+        start_day = normalize_day(start_day)
+        end_day = end_day_of(start_day, total_days)
+
         cursor = self.conn.cursor()
+        if idempotency_key is not None:
+            original = self._find_idempotent_booking(cursor, idempotency_key)
+            if original:
+                return self._replay_booking(idempotency_key, original, (employee_name, start_day, total_days))
 
-        # Find employee and current timeoff balance
-        cursor.execute('SELECT id, allowed_days, consumed_days FROM employee WHERE name = ?', (employee_name,))
-        row = cursor.fetchone()        
-        if not row:
-            raise ValueError(f"Employee {employee_name} not found")
-        employee_id, allowed_days, consumed_days = row # unpack employee data
-        if consumed_days + total_days > allowed_days:
-            raise ValueError(f"Employee {employee_name} does not have enough time off balance to request {total_days} days (current balance: {allowed_days - consumed_days} days)")
-        
-        # insert into timeoff history
+        # Take the write lock up front so the balance check and the booking
+        # can't interleave with another connection's booking
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            if idempotency_key is not None:
+                # Another connection may have booked the same key since the lookup above
+                original = self._find_idempotent_booking(cursor, idempotency_key)
+                if original:
+                    self.conn.rollback()
+                    return self._replay_booking(idempotency_key, original, (employee_name, start_day, total_days))
+
+            # Consume the days only if the balance covers them
+            cursor.execute('''
+                UPDATE employee SET consumed_days = consumed_days + ?
+                WHERE name = ? AND consumed_days + ? <= allowed_days
+                RETURNING id, allowed_days - consumed_days
+            ''', (total_days, employee_name, total_days))
+            row = cursor.fetchone()
+            if not row:
+                raise self._booking_rejection(cursor, employee_name, total_days)
+            employee_id, new_balance = row
+
+            overlapping = self._find_overlapping_timeoff(cursor, employee_id, start_day, end_day)
+            if overlapping:
+                raise ValueError(f"Employee {employee_name} already has time off from {overlapping[0]} to {overlapping[1]}, which overlaps the requested {start_day} to {end_day}")
+
+            # insert into timeoff history
+            cursor.execute('''
+                INSERT INTO timeoff_history (employee_id, start_day, total_days, end_day, idempotency_key)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (employee_id, start_day, total_days, end_day, idempotency_key))
+
+            # and mark each day of it as an absence
+            first_day = date.fromisoformat(start_day)
+            cursor.executemany('''
+                INSERT INTO timeoff_absence (day, employee_id) VALUES (?, ?)
+            ''', [((first_day + timedelta(days=i)).isoformat(), employee_id) for i in range(total_days)])
+
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+        # Write through only once the booking is committed
+        self.balance_cache.put(employee_name, new_balance)
+        return booking_message(employee_name, total_days)
+
+
+    def _find_idempotent_booking(self, cursor, idempotency_key):
         cursor.execute('''
-            INSERT INTO timeoff_history (employee_id, start_day, total_days)
-            VALUES (?, ?, ?)
-        ''', (employee_id, start_day, total_days))
+            SELECT e.name, h.start_day, h.total_days FROM timeoff_history h
+            JOIN employee e ON e.id = h.employee_id
+            WHERE h.idempotency_key = ?
+        ''', (idempotency_key,))
+        return cursor.fetchone()
+
 
-        # update time off balance
-        new_consumed = consumed_days + total_days
+    def _replay_booking(self, idempotency_key, original, requested):
+        if tuple(original) != requested:
+            raise ValueError(f"Idempotency key {idempotency_key} was already used for a different request: {original[2]} days from {original[1]} for employee {original[0]}")
+        return booking_message(original[0], original[2])
+
+
+    def _find_overlapping_timeoff(self, cursor, employee_id, start_day, end_day):
+        # An employee's bookings never overlap each other, so the only one that
+        # can overlap [start_day, end_day] is the last one starting on or before
+        # end_day. Finding it is a single descending seek on
+        # idx_timeoff_history_employee_start: O(log n) however long the history.
         cursor.execute('''
-            UPDATE employee SET consumed_days = ? WHERE id = ?
-        ''', (new_consumed, employee_id))
+            SELECT start_day, end_day FROM timeoff_history
+            WHERE employee_id = ? AND start_day <= ?
+            ORDER BY start_day DESC LIMIT 1
+        ''', (employee_id, end_day))
+        row = cursor.fetchone()
+        if row and row[1] >= start_day:
+            return row
+        return None
 
-        self.conn.commit()
-        return f"Successfully added timeoff request for {total_days} days for employee {employee_name}"
+
+    def _booking_rejection(self, cursor, employee_name, total_days):
+        # Explains why the guarded UPDATE matched no row
+        cursor.execute('SELECT allowed_days - consumed_days FROM employee WHERE name = ?', (employee_name,))
+        row = cursor.fetchone()
+        if not row:
+            return ValueError(f"Employee {employee_name} not found")
+        self.balance_cache.put(employee_name, row[0])
+        return ValueError(f"Employee {employee_name} does not have enough time off balance to request {total_days} days (current balance: {row[0]} days)")
+
+
+    def get_timeoff_history(self, employee_name, from_day=None, to_day=None, limit=20, cursor=None):
+        """Returns one page of the employee's timeoff history ordered by start day.
+
+        Pages are keyset paginated on (start_day, id): pass the returned
+        next_cursor back in to fetch the following page. Returns None when
+        the employee does not exist.
+        """
+        if limit < 1 or limit > MAX_HISTORY_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_HISTORY_PAGE_SIZE}")
+
+        db_cursor = self.conn.cursor()
+        db_cursor.execute('SELECT id FROM employee WHERE name = ?', (employee_name,))
+        row = db_cursor.fetchone()
+        if not row:
+            return None
+        employee_id = row[0]
+
+        query = '''
+            SELECT id, start_day, total_days, end_day FROM timeoff_history
+            WHERE employee_id = ?
+        '''
+        params = [employee_id]
+        if from_day:
+            query += ' AND start_day >= ?'
+            params.append(normalize_day(from_day))
+        if to_day:
+            query += ' AND start_day <= ?'
+            params.append(normalize_day(to_day))
+        if cursor:
+            last_start_day, last_id = decode_history_cursor(cursor)
+            query += ' AND (start_day, id) > (?, ?)'
+            params.extend([last_start_day, last_id])
+        # fetch one extra row to learn whether another page exists
+        query += ' ORDER BY start_day, id LIMIT ?'
+        params.append(limit + 1)
+
+        db_cursor.execute(query, params)
+        rows = db_cursor.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_id, last_start_day, _, _ = rows[-1]
+            next_cursor = encode_history_cursor(last_start_day, last_id)
+
+        return {
+            "employee_name": employee_name,
+            "records": [
+                {"start_day": start_day, "total_days": total_days, "end_day": end_day}
+                for _, start_day, total_days, end_day in rows
+            ],
+            "next_cursor": next_cursor,
+        }
+
+
+
+    def get_absences(self, from_day, to_day=None, include_names=True):
+        """Returns who is out on each day from from_day to to_day (inclusive).
+
+        Answered from the timeoff_absence table, so the cost depends on the
+        number of absences in the range rather than on the size of the
+        history. Days on which nobody is out are left out of the result.
+        """
+        from_day = normalize_day(from_day)
+        to_day = normalize_day(to_day) if to_day else from_day
+        range_days = (date.fromisoformat(to_day) - date.fromisoformat(from_day)).days + 1
+        if range_days < 1 or range_days > MAX_ABSENCE_RANGE_DAYS:
+            raise ValueError(f"Date range must cover 1 to {MAX_ABSENCE_RANGE_DAYS} days")
+
+        cursor = self.conn.cursor()
+        days = {}
+        if include_names:
+            cursor.execute('''
+                SELECT a.day, e.name FROM timeoff_absence a
+                JOIN employee e ON e.id = a.employee_id
+                WHERE a.day BETWEEN ? AND ?
+                ORDER BY a.day, e.name
+            ''', (from_day, to_day))
+            for day, employee_name in cursor.fetchall():
+                days.setdefault(day, {"headcount": 0, "employees": []})
+                days[day]["headcount"] += 1
+                days[day]["employees"].append(employee_name)
+        else:
+            cursor.execute('''
+                SELECT day, COUNT(*) FROM timeoff_absence
+                WHERE day BETWEEN ? AND ?
+                GROUP BY day ORDER BY day
+            ''', (from_day, to_day))
+            for day, headcount in cursor.fetchall():
+                days[day] = {"headcount": headcount}
+
+        return {"from_day": from_day, "to_day": to_day, "days": days}
+
+
+    def bulk_import_employees(self, rows, batch_size=IMPORT_BATCH_SIZE):
+        """Inserts or updates employees from an iterable of dicts with
+        name, allowed_days and (optionally) consumed_days.
+
+        Rows are streamed into executemany batches, each committed as one
+        transaction. Rows missing a name or with non-numeric day counts are
+        skipped. Returns import statistics including rows/sec.
+        """
+        skipped = 0
+
+        def employee_params():
+            nonlocal skipped
+            for row in rows:
+                try:
+                    name = row["name"].strip()
+                    allowed_days = int(row["allowed_days"])
+                    consumed_days = int(row.get("consumed_days") or 0)
+                except (KeyError, AttributeError, TypeError, ValueError):
+                    skipped += 1
+                    continue
+                if not name:
+                    skipped += 1
+                    continue
+                yield (name, allowed_days, consumed_days)
+
+        started = time.perf_counter()
+        imported = self._executemany_in_batches('''
+            INSERT INTO employee (name, allowed_days, consumed_days)
+            VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                allowed_days = excluded.allowed_days,
+                consumed_days = excluded.consumed_days
+        ''', employee_params(), batch_size, self._refresh_cached_balances)
+        return import_stats(imported, skipped, time.perf_counter() - started)
+
+
+    def bulk_import_timeoff_history(self, rows, batch_size=IMPORT_BATCH_SIZE):
+        """Appends historical timeoff records from an iterable of dicts with
+        employee_name, start_day and total_days.
+
+        History indexes are dropped for the load and rebuilt once at the end.
+        Records are taken as-is from the source system: employee balances are
+        not touched, so import the employees' consumed_days alongside. Rows
+        for unknown employees, with malformed values or under 1 day are
+        skipped, and so are rows overlapping an existing booking or an
+        earlier row of the import, see _remove_overlapping_imports.
+        """
+        employee_ids = dict(self.conn.execute('SELECT name, id FROM employee'))
+        skipped = 0
+
+        def history_params():
+            nonlocal skipped
+            for row in rows:
+                try:
+                    employee_id = employee_ids[row["employee_name"].strip()]
+                    start_day = normalize_day(row["start_day"].strip())
+                    total_days = int(row["total_days"])
+                    if total_days < 1:
+                        raise ValueError(f"Time off must be for at least 1 day, got {total_days}")
+                    end_day = end_day_of(start_day, total_days)
+                except (KeyError, AttributeError, TypeError, ValueError, OverflowError):
+                    skipped += 1
+                    continue
+                yield (employee_id, start_day, total_days, end_day)
+
+        started = time.perf_counter()
+        last_history_id = self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM timeoff_history').fetchone()[0]
+        self.drop_indexes()
+        try:
+            imported = self._executemany_in_batches('''
+                INSERT INTO timeoff_history (employee_id, start_day, total_days, end_day)
+                VALUES (?, ?, ?, ?)
+            ''', history_params(), batch_size)
+        finally:
+            self.create_indexes()
+            overlapping = self._remove_overlapping_imports(last_history_id)
+            self._expand_absences_after(last_history_id)
+        return import_stats(imported - overlapping, skipped + overlapping, time.perf_counter() - started)
+
+
+    def _remove_overlapping_imports(self, last_history_id):
+        """Deletes imported rows (id > last_history_id) that overlap another
+        booking of the same employee; returns how many were deleted.
+
+        Overlaps are looked for once the load is done, and only for the
+        employees the import added rows to: each one's history is walked in
+        start day order by seeking the rebuilt (employee_id, start_day)
+        index. Each row is compared with the last row kept before it, and of
+        two overlapping rows the one inserted later goes: existing bookings
+        always stay, and among imported rows the first in the import wins.
+        What is kept never overlaps, as _find_overlapping_timeoff expects.
+        """
+        removed = []
+        imported_employee_ids = [employee_id for (employee_id,) in self.conn.execute(
+            'SELECT DISTINCT employee_id FROM timeoff_history WHERE id > ?', (last_history_id,))]
+        for employee_id in imported_employee_ids:
+            last_id = last_end_day = None
+            for history_id, start_day, end_day in self.conn.execute('''
+                SELECT id, start_day, end_day FROM timeoff_history
+                WHERE employee_id = ? ORDER BY start_day, id
+            ''', (employee_id,)):
+                overlapping = last_id is not None and start_day <= last_end_day
+                if overlapping and history_id > last_history_id and history_id > last_id:
+                    removed.append((history_id,))
+                    continue
+                if overlapping and last_id > last_history_id:
+                    removed.append((last_id,))
+                last_id, last_end_day = history_id, end_day
+
+        if removed:
+            self.conn.executemany('DELETE FROM timeoff_history WHERE id = ?', removed)
+            self.conn.commit()
+        return len(removed)
+
+
+    def close(self):
+        self.conn.close()
+
+
+    def _refresh_cached_balances(self, employee_rows):
+        for name, allowed_days, consumed_days in employee_rows:
+            self.balance_cache.refresh(name, allowed_days - consumed_days)
+
+
+    def _executemany_in_batches(self, sql, params, batch_size, on_batch_committed=None):
+        imported = 0
+        cursor = self.conn.cursor()
+        for batch in itertools.batched(params, batch_size):
+            try:
+                cursor.executemany(sql, batch)
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+            if on_batch_committed:
+                on_batch_committed(batch)
+            imported += len(batch)
+        return imported
 
 
 if __name__ == "__main__":
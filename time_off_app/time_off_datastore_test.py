@@ -0,0 +1,476 @@
+import sys
+import os
+import asyncio
+import itertools
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+
+# Add project root and this folder to sys.path to find utils and the datastore
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from utils.log_utils import log_message
+from time_off_datastore import TimeOffDatastore
+from time_off_async_datastore import AsyncTimeOffDatastore
+from time_off_sharded_datastore import ShardedTimeOffDatastore
+
+
+class TimeOffDatastoreTest:
+    """Test class for TimeOffDatastore"""
+
+    def test_history_uses_index(self):
+        """History lookups should be served by the (employee_id, start_day) index"""
+        db = TimeOffDatastore()
+        plan = db.conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT id, start_day, total_days FROM timeoff_history
+            WHERE employee_id = 1 AND start_day >= '2025-01-01'
+            ORDER BY start_day, id LIMIT 10
+        ''').fetchall()
+        log_message("Test", f"History query plan: {plan}")
+
+        assert any("idx_timeoff_history_employee_start" in step[-1] for step in plan), \
+            "Expected history query to use idx_timeoff_history_employee_start"
+
+        # The post-import overlap walk seeks one imported employee at a time
+        plan = db.conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT id, start_day, end_day FROM timeoff_history
+            WHERE employee_id = 1 ORDER BY start_day, id
+        ''').fetchall()
+        assert any("idx_timeoff_history_employee_start" in step[-1] for step in plan), \
+            "Expected the overlap walk to use idx_timeoff_history_employee_start"
+        assert not any("TEMP B-TREE" in step[-1] for step in plan), f"Expected no sort in {plan}"
+        log_message("Test", "✓ History query uses the index")
+
+    def test_history_pagination(self):
+        """Pages should cover every record in order exactly once"""
+        db = TimeOffDatastore()
+        for month in range(1, 6):
+            db.add_timeoff_request("Charlie", f"2025-{month:02d}-10", 1)
+            db.add_timeoff_request("Charlie", f"2025-{month:02d}-03", 1)
+
+        start_days = []
+        cursor = None
+        pages = 0
+        while True:
+            page = db.get_timeoff_history("Charlie", limit=3, cursor=cursor)
+            start_days.extend(record["start_day"] for record in page["records"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert pages == 4, f"Expected 4 pages, got {pages}"
+        assert start_days == sorted(start_days), "Expected records ordered by start day"
+        assert len(start_days) == 10, f"Expected 10 records, got {len(start_days)}"
+
+        window = db.get_timeoff_history("Charlie", from_day="2025-02-01", to_day="2025-03-31")
+        assert [r["start_day"] for r in window["records"]] == \
+            ["2025-02-03", "2025-02-10", "2025-03-03", "2025-03-10"]
+        assert window["next_cursor"] is None
+
+        assert db.get_timeoff_history("Nobody") is None
+        log_message("Test", "✓ History pagination assertions passed!")
+
+    def test_bulk_import(self):
+        """Bulk imports should upsert employees, load history and skip bad rows"""
+        db = TimeOffDatastore()
+        employees = [{"name": f"Employee {i}", "allowed_days": "20", "consumed_days": "2"} for i in range(20000)]
+        employees.append({"name": "Alice", "allowed_days": 30, "consumed_days": 0})
+        employees.append({"name": "", "allowed_days": 10})
+        stats = db.bulk_import_employees(iter(employees), batch_size=5000)
+        log_message("Test", f"Employee import stats: {stats}")
+
+        assert stats["rows_imported"] == 20001, f"Expected 20001 employees, got {stats}"
+        assert stats["rows_skipped"] == 1
+        assert db.get_timeoff_balance("Alice") == 30, "Expected Alice to be updated in place"
+        assert db.get_timeoff_balance("Employee 19999") == 18
+
+        history = ({"employee_name": f"Employee {i % 20000}", "start_day": f"2024-{i % 12 + 1:02d}-01", "total_days": 1}
+                   for i in range(60000))
+        stats = db.bulk_import_timeoff_history(
+            itertools.chain(history, [{"employee_name": "Nobody", "start_day": "2024-01-01", "total_days": 1}]))
+        log_message("Test", f"History import stats: {stats}")
+
+        assert stats["rows_imported"] == 60000
+        assert stats["rows_skipped"] == 1
+        page = db.get_timeoff_history("Employee 7")
+        assert len(page["records"]) == 3, f"Expected 3 history records, got {page}"
+        assert db.conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'idx_timeoff_history_employee_start'").fetchone(), \
+            "Expected the history index to be rebuilt after import"
+        log_message("Test", "✓ Bulk import assertions passed!")
+
+    def test_bulk_import_rejects_overlaps(self):
+        """Imported rows under 1 day, or overlapping a booking or an earlier row, should be skipped"""
+        db = TimeOffDatastore()
+        db.add_timeoff_request("Alice", "2025-03-10", 5)  # 10th to 14th
+
+        stats = db.bulk_import_timeoff_history([
+            {"employee_name": "Alice", "start_day": "2025-03-08", "total_days": 3},   # overlaps the booking
+            {"employee_name": "Alice", "start_day": "2025-03-15", "total_days": 2},   # 15th and 16th
+            {"employee_name": "Alice", "start_day": "2025-03-16", "total_days": 1},   # overlaps the row above
+            {"employee_name": "Alice", "start_day": "2025-03-20", "total_days": 0},
+            {"employee_name": "Alice", "start_day": "2025-03-21", "total_days": -2},
+            {"employee_name": "Bob", "start_day": "2025-03-10", "total_days": 5},     # another employee's days
+            {"employee_name": "Bob", "start_day": "2025-03-01", "total_days": 10},    # overlaps Bob's earlier row, starting before it
+        ])
+        log_message("Test", f"Overlapping import stats: {stats}")
+
+        assert stats["rows_imported"] == 2 and stats["rows_skipped"] == 5, f"Unexpected stats {stats}"
+        alice = [(r["start_day"], r["end_day"]) for r in db.get_timeoff_history("Alice")["records"]]
+        assert alice == [("2025-03-10", "2025-03-14"), ("2025-03-15", "2025-03-16")], f"Unexpected history {alice}"
+        bob = [(r["start_day"], r["end_day"]) for r in db.get_timeoff_history("Bob")["records"]]
+        assert bob == [("2025-03-10", "2025-03-14")], f"Unexpected history {bob}"
+        assert db.get_absences("2025-03-08", "2025-03-09")["days"] == {}, "Expected no absences from skipped rows"
+
+        try:
+            db.add_timeoff_request("Alice", "2025-03-16", 1)
+            assert False, "Expected a booking overlapping an imported row to be rejected"
+        except ValueError as e:
+            assert "overlaps" in str(e), f"Unexpected error: {e}"
+        log_message("Test", "✓ Overlapping import assertions passed!")
+
+    def _run_concurrently(self, db_path, workers, work):
+        """Runs work(db, worker_index) on `workers` threads, each with its own connection"""
+        errors = []
+
+        def run(worker_index):
+            try:
+                work(TimeOffDatastore(db_path), worker_index)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, f"Unexpected errors: {errors}"
+        return time.perf_counter() - started
+
+    def test_concurrent_booking(self):
+        """Concurrent bookings must never overbook and should sustain a useful rate"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "timeoff.db")
+            TimeOffDatastore(db_path)  # create the schema once up front
+
+            # 8 connections race for Bob's 12 remaining days, one day at a time
+            successes = []
+
+            def book_bob(db, worker_index):
+                for i in range(10):
+                    try:
+                        db.add_timeoff_request("Bob", f"2025-0{worker_index + 1}-{i + 1:02d}", 1)
+                        successes.append(1)
+                    except ValueError:
+                        pass
+
+            self._run_concurrently(db_path, 8, book_bob)
+
+            db = TimeOffDatastore(db_path)
+            booked_days = db.conn.execute('SELECT SUM(total_days) FROM timeoff_history').fetchone()[0]
+            assert len(successes) == 12, f"Expected exactly 12 bookings, got {len(successes)}"
+            assert booked_days == 12, f"Expected 12 booked days in history, got {booked_days}"
+            assert db.get_timeoff_balance("Bob") == 0, "Expected Bob's balance to be used up exactly"
+
+            # Throughput: each connection books for its own employee
+            workers, bookings_per_worker = 8, 200
+            db.bulk_import_employees(
+                {"name": f"Worker {i}", "allowed_days": bookings_per_worker} for i in range(workers))
+
+            def book_own(db, worker_index):
+                for i in range(bookings_per_worker):
+                    day = date(2026, 1, 1) + timedelta(days=i)
+                    db.add_timeoff_request(f"Worker {worker_index}", day.isoformat(), 1)
+
+            elapsed = self._run_concurrently(db_path, workers, book_own)
+            log_message("Test", f"Concurrent bookings/sec: {workers * bookings_per_worker / elapsed:.0f}")
+            assert all(db.get_timeoff_balance(f"Worker {i}") == 0 for i in range(workers))
+        log_message("Test", "✓ Concurrent booking assertions passed!")
+
+    async def test_async_datastore(self):
+        """Async calls should run off the event loop with a bounded queue"""
+        db = AsyncTimeOffDatastore(max_pending=4)
+        peak_pending = 0
+
+        async def read_balance():
+            nonlocal peak_pending
+            balance = await db.get_timeoff_balance("Alice")
+            peak_pending = max(peak_pending, db.pending)
+            return balance
+
+        balances = await asyncio.gather(*(read_balance() for _ in range(200)))
+        assert balances == [15] * 200, "Expected every read to see Alice's balance"
+        assert peak_pending <= 4, f"Expected at most 4 queued calls, saw {peak_pending}"
+
+        message = await db.add_timeoff_request("Alice", "2025-05-05", 5)
+        assert "Successfully" in message
+        assert await db.get_timeoff_balance("Alice") == 10
+        db.close()
+        log_message("Test", "✓ Async datastore assertions passed!")
+
+    def test_balance_cache(self):
+        """The balance cache should stay consistent through bookings and imports"""
+        db = TimeOffDatastore(balance_cache_size=2, verify_balance_cache=True)
+
+        assert db.get_timeoff_balance("Alice") == 15
+        assert db.get_timeoff_balance("Alice") == 15
+        db.add_timeoff_request("Alice", "2025-06-01", 2)
+        assert db.get_timeoff_balance("Alice") == 13, "Expected the booking to write through"
+
+        try:
+            db.add_timeoff_request("Alice", "2025-07-01", 50)
+        except ValueError:
+            pass
+        assert db.get_timeoff_balance("Alice") == 13, "Expected a rejected booking to leave the balance alone"
+
+        db.bulk_import_employees([{"name": "Alice", "allowed_days": 40, "consumed_days": 1}])
+        assert db.get_timeoff_balance("Alice") == 39, "Expected the import to write through"
+
+        # Bob and Charlie push Alice out of the 2-entry cache
+        db.get_timeoff_balance("Bob")
+        db.get_timeoff_balance("Charlie")
+        assert db.get_timeoff_balance("Nobody") is None
+        assert db.check_balance_cache() == [], "Expected no stale cache entries"
+
+        stats = db.balance_cache_stats()
+        log_message("Test", f"Balance cache stats: {stats}")
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 4
+        assert stats["misses"] == 4
+
+        # Writes behind the cache's back are caught by the self-check
+        db.conn.execute("UPDATE employee SET consumed_days = 0 WHERE name = 'Bob'")
+        db.conn.commit()
+        assert db.check_balance_cache() == ["Bob"]
+        try:
+            db.get_timeoff_balance("Bob")
+            assert False, "Expected the self-check to flag the stale entry"
+        except RuntimeError:
+            pass
+        log_message("Test", "✓ Balance cache assertions passed!")
+
+    def test_batch_balances(self):
+        """A team's balances should come back from one call, unknown names as None"""
+        db = TimeOffDatastore(verify_balance_cache=True)
+        db.bulk_import_employees({"name": f"Member {i}", "allowed_days": 10, "consumed_days": i % 10}
+                                 for i in range(1200))
+        db.get_timeoff_balance("Bob")  # one name already cached
+
+        team = ["Bob", "Alice", "Nobody"] + [f"Member {i}" for i in range(1200)]
+        balances = db.get_timeoff_balances(team)
+
+        assert list(balances) == team, "Expected results in the requested order"
+        assert balances["Alice"] == 15 and balances["Bob"] == 12
+        assert balances["Nobody"] is None
+        assert balances["Member 1199"] == 1
+        assert db.get_timeoff_balances([]) == {}
+        assert db.check_balance_cache() == []
+        log_message("Test", "✓ Batch balance assertions passed!")
+
+    def test_overlap_rejection(self):
+        """Bookings overlapping an existing one should be rejected without consuming days"""
+        db = TimeOffDatastore()
+        db.add_timeoff_request("Charlie", "2025-03-10", 5)  # 10th to 14th
+        db.add_timeoff_request("Charlie", "2025-03-20", 1)
+
+        for start_day, total_days in [("2025-03-14", 1), ("2025-03-08", 3), ("2025-03-11", 1),
+                                      ("2025-03-05", 8), ("2025-03-19", 2)]:
+            try:
+                db.add_timeoff_request("Charlie", start_day, total_days)
+                assert False, f"Expected {start_day} for {total_days} days to be rejected"
+            except ValueError as e:
+                assert "overlaps" in str(e), f"Unexpected error: {e}"
+
+        db.add_timeoff_request("Charlie", "2025-03-15", 5)  # fills the 15th to the 19th exactly
+        db.add_timeoff_request("Charlie", "2025-03-09", 1)
+        assert db.get_timeoff_balance("Charlie") == 3, "Expected rejected requests not to consume days"
+
+        try:
+            db.add_timeoff_request("Charlie", "March 1st", 1)
+            assert False, "Expected a malformed start day to be rejected"
+        except ValueError:
+            pass
+
+        page = db.get_timeoff_history("Charlie")
+        assert page["records"][0] == {"start_day": "2025-03-09", "total_days": 1, "end_day": "2025-03-09"}
+        log_message("Test", "✓ Overlap rejection assertions passed!")
+
+    def test_idempotent_booking(self):
+        """Retrying a booking with the same idempotency key should return the original result"""
+        db = TimeOffDatastore()
+        first = db.add_timeoff_request("Alice", "2025-05-05", 5, idempotency_key="msg-1:Alice:2025-05-05:5")
+        retry = db.add_timeoff_request("Alice", "2025-05-05", 5, idempotency_key="msg-1:Alice:2025-05-05:5")
+        assert retry == first, f"Expected the original result, got {retry}"
+        assert db.get_timeoff_balance("Alice") == 10, "Expected the retry not to consume days"
+
+        try:
+            db.add_timeoff_request("Alice", "2025-06-02", 2, idempotency_key="msg-1:Alice:2025-05-05:5")
+            assert False, "Expected a reused key with different parameters to be rejected"
+        except ValueError as e:
+            assert "already used" in str(e), f"Unexpected error: {e}"
+
+        # Bookings without a key are unaffected, and the duplicate check is an index lookup
+        db.add_timeoff_request("Alice", "2025-06-02", 2)
+        plan = db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM timeoff_history WHERE idempotency_key = ?", ("msg-1",)).fetchall()
+        assert any("idx_timeoff_history_idempotency_key" in row[-1] for row in plan), plan
+
+        # Concurrent retries on separate connections book once
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "timeoff.db")
+            TimeOffDatastore(db_path).close()
+            results = []
+
+            def book_retry(db, worker_index):
+                results.append(db.add_timeoff_request("Bob", "2025-07-01", 3, idempotency_key="msg-2"))
+
+            self._run_concurrently(db_path, 8, book_retry)
+            db = TimeOffDatastore(db_path)
+            assert len(results) == 8 and len(set(results)) == 1, results
+            assert db.get_timeoff_balance("Bob") == 9, "Expected exactly one booking for Bob"
+            db.close()
+        log_message("Test", "✓ Idempotent booking assertions passed!")
+
+    def test_shared_writers(self):
+        """Cached balances should not outlive a booking made by another process"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "timeoff.db")
+            reader = TimeOffDatastore(db_path, shared_writers=True)
+            writer = TimeOffDatastore(db_path, shared_writers=True)
+            assert reader.get_timeoff_balance("Alice") == 15
+            assert reader.get_timeoff_balance("Alice") == 15
+            assert reader.balance_cache_stats()["hits"] == 1, "Expected repeat reads to hit the cache"
+
+            writer.add_timeoff_request("Alice", "2025-05-05", 5)
+            assert reader.get_timeoff_balance("Alice") == 10, "Expected the other writer's booking to be seen"
+            assert reader.get_timeoff_balances(["Alice", "Bob"]) == {"Alice": 10, "Bob": 12}
+
+            # and the other way round
+            reader.add_timeoff_request("Alice", "2025-06-02", 2)
+            assert writer.get_timeoff_balance("Alice") == 8
+            assert not reader.check_balance_cache() and not writer.check_balance_cache()
+            reader.close()
+            writer.close()
+        log_message("Test", "✓ Shared writer assertions passed!")
+
+    def test_absences(self):
+        """The absence table should follow bookings and imports and answer by index"""
+        db = TimeOffDatastore()
+        db.add_timeoff_request("Alice", "2025-06-30", 3)
+        db.add_timeoff_request("Bob", "2025-07-01", 1)
+        db.bulk_import_timeoff_history([{"employee_name": "Charlie", "start_day": "2025-07-02", "total_days": 2}])
+
+        week = db.get_absences("2025-06-29", "2025-07-05")
+        assert week["days"] == {
+            "2025-06-30": {"headcount": 1, "employees": ["Alice"]},
+            "2025-07-01": {"headcount": 2, "employees": ["Alice", "Bob"]},
+            "2025-07-02": {"headcount": 2, "employees": ["Alice", "Charlie"]},
+            "2025-07-03": {"headcount": 1, "employees": ["Charlie"]},
+        }, f"Unexpected absences: {week}"
+        assert db.get_absences("2025-07-01", include_names=False)["days"] == {"2025-07-01": {"headcount": 2}}
+        assert db.get_absences("2025-08-01")["days"] == {}
+
+        try:
+            db.get_absences("2025-01-01", "2026-12-31")
+            assert False, "Expected an oversized range to be rejected"
+        except ValueError:
+            pass
+
+        plan = db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT day, COUNT(*) FROM timeoff_absence WHERE day BETWEEN ? AND ? GROUP BY day",
+            ("2025-07-01", "2025-07-07")).fetchall()
+        assert any("SEARCH timeoff_absence USING PRIMARY KEY" in step[-1] for step in plan), \
+            f"Expected a primary key range search, got {plan}"
+
+        # Databases from before the absence table get it backfilled on open
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "timeoff.db")
+            old_db = TimeOffDatastore(db_path)
+            old_db.add_timeoff_request("Bob", "2025-09-01", 2)
+            old_db.conn.execute("DROP TABLE timeoff_absence")
+            old_db.conn.commit()
+            old_db.conn.close()
+            reopened = TimeOffDatastore(db_path)
+            assert reopened.get_absences("2025-09-02")["days"] == {"2025-09-02": {"headcount": 1, "employees": ["Bob"]}}
+            reopened.conn.close()
+        log_message("Test", "✓ Absence assertions passed!")
+
+    def test_sharded_datastore(self):
+        """Sharded storage should route employees stably and gather cross-shard reads"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = ShardedTimeOffDatastore(os.path.join(tmp_dir, "timeoff.db"), shard_count=4)
+            stats = db.bulk_import_employees(
+                [{"name": f"Member {i}", "allowed_days": 10} for i in range(5000)] + [{"allowed_days": 1}])
+            assert stats["rows_imported"] == 5000 and stats["rows_skipped"] == 1, f"Unexpected stats {stats}"
+            stats = db.bulk_import_timeoff_history(
+                {"employee_name": f"Member {i}", "start_day": "2025-12-24", "total_days": 2} for i in range(0, 5000, 2))
+            assert stats["rows_imported"] == 2500, f"Unexpected stats {stats}"
+
+            sizes = [shard.conn.execute("SELECT COUNT(*) FROM employee").fetchone()[0] for shard in db.shards]
+            assert sum(sizes) == 5003, f"Expected every employee on exactly one shard, got {sizes}"
+            assert min(sizes) > 1000, f"Expected employees spread over the shards, got {sizes}"
+
+            db.add_timeoff_request("Alice", "2025-12-24", 1)
+            balances = db.get_timeoff_balances(["Alice", "Member 1", "Nobody", "Member 2"])
+            assert balances == {"Alice": 14, "Member 1": 10, "Nobody": None, "Member 2": 10}, balances
+            absences = db.get_absences("2025-12-24", "2025-12-26", include_names=False)
+            assert absences["days"] == {"2025-12-24": {"headcount": 2501}, "2025-12-25": {"headcount": 2500}}
+            assert db.get_absences("2025-12-24")["days"]["2025-12-24"]["employees"][:2] == ["Alice", "Member 0"]
+            assert db.get_timeoff_history("Member 4")["records"][0]["end_day"] == "2025-12-25"
+            db.close()
+
+            # Reopening routes every name to the same shard again
+            reopened = ShardedTimeOffDatastore(os.path.join(tmp_dir, "timeoff.db"), shard_count=4)
+            assert reopened.get_timeoff_balance("Member 4999") == 10
+            assert reopened.get_timeoff_balance("Alice") == 14, "Expected seeding not to reset balances"
+            reopened.close()
+        log_message("Test", "✓ Sharded datastore assertions passed!")
+
+    def test_concurrent_sharded_imports(self):
+        """Bulk imports started together on a sharded store should both finish"""
+        for _ in range(5):
+            db = ShardedTimeOffDatastore(shard_count=4)
+            start = threading.Barrier(2)
+            stats = []
+
+            def import_members(prefix):
+                start.wait()
+                # Enough rows per shard to fill its bounded feed several times over
+                stats.append(db.bulk_import_employees(
+                    {"name": f"{prefix} {i}", "allowed_days": 10} for i in range(60000)))
+
+            threads = [threading.Thread(target=import_members, args=(prefix,), daemon=True) for prefix in "AB"]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=30)
+            assert not any(thread.is_alive() for thread in threads), "Expected concurrent imports not to deadlock"
+            assert [s["rows_imported"] for s in stats] == [60000, 60000], f"Unexpected stats {stats}"
+            db.close()
+        log_message("Test", "✓ Concurrent sharded import assertions passed!")
+
+
+if __name__ == "__main__":
+    # Run the tests
+    test_suite = TimeOffDatastoreTest()
+    test_suite.test_history_uses_index()
+    test_suite.test_history_pagination()
+    test_suite.test_bulk_import()
+    test_suite.test_bulk_import_rejects_overlaps()
+    test_suite.test_concurrent_booking()
+    asyncio.run(test_suite.test_async_datastore())
+    test_suite.test_balance_cache()
+    test_suite.test_batch_balances()
+    test_suite.test_overlap_rejection()
+    test_suite.test_idempotent_booking()
+    test_suite.test_shared_writers()
+    test_suite.test_absences()
+    test_suite.test_sharded_datastore()
+    test_suite.test_concurrent_sharded_imports()
@@ -0,0 +1,66 @@
+import re
+from datetime import date
+
+
+#-----------------------------------------------------------------------
+# Patterns for prompts simple enough to answer without the LLM.
+# They are deliberately strict: anything they don't match fully goes to
+# the ReAct agent.
+#-----------------------------------------------------------------------
+_TIMEOFF_WORDS = r"(?:time[\s-]?off|vacation|leave|pto)"
+
+BALANCE_PATTERNS = [
+    re.compile(rf"^(?:what(?:'s| is)|show(?: me)?|check|get|tell me)\s+(?:my\s+)?(?:current\s+|remaining\s+)?"
+               rf"{_TIMEOFF_WORDS}\s+balance(?:\s+now)?$", re.IGNORECASE),
+    re.compile(rf"^how many (?:{_TIMEOFF_WORDS}\s+)?days (?:off\s+)?do i have (?:left|remaining)(?:\s+now)?$",
+               re.IGNORECASE),
+]
+
+REQUEST_PATTERN = re.compile(
+    rf"^(?:please\s+)?(?:file|create|submit|book|request)\s+(?:a\s+|an\s+)?(?:{_TIMEOFF_WORDS}\s+)?(?:request\s+)?"
+    r"for\s+(?P<total_days>\d{1,3})\s+days?\s+"
+    r"(?:starting(?:\s+(?:from|on))?|beginning(?:\s+on)?|from)\s+(?P<start_date>\d{4}-\d{2}-\d{2})$",
+    re.IGNORECASE)
+
+
+def _normalize(prompt: str) -> str:
+    return " ".join(prompt.split()).rstrip(" ?.!")
+
+
+def parse_simple_intent(prompt: str) -> dict | None:
+    """Recognizes balance checks and well-formed "N days starting YYYY-MM-DD" requests.
+
+    Returns {"intent": "balance"}, {"intent": "request_timeoff", "start_date": ..., "total_days": ...}
+    or None when the prompt needs the agent.
+    """
+    text = _normalize(prompt)
+    if any(pattern.match(text) for pattern in BALANCE_PATTERNS):
+        return {"intent": "balance"}
+
+    match = REQUEST_PATTERN.match(text)
+    if match:
+        try:
+            date.fromisoformat(match["start_date"])
+        except ValueError:
+            return None
+        total_days = int(match["total_days"])
+        if total_days < 1:
+            return None
+        return {"intent": "request_timeoff", "start_date": match["start_date"], "total_days": total_days}
+
+    return None
+
+
+def format_balance_answer(user: str, balance_text: str) -> str:
+    balance_text = balance_text.strip()
+    if not balance_text.lstrip("-").isdigit():
+        return f"I couldn't find a time off balance for {user}."
+    days = int(balance_text)
+    return f"{user}, you have {days} day{'' if days == 1 else 's'} of time off remaining."
+
+
+def format_request_answer(user: str, start_date: str, total_days: int, result_text: str, is_error: bool) -> str:
+    if is_error:
+        return f"I couldn't file the time off request for {user}: {result_text.strip()}"
+    return (f"Done! Your time off request for {total_days} day{'' if total_days == 1 else 's'} "
+            f"starting {start_date} has been filed.")
@@ -0,0 +1,65 @@
+import sys
+import os
+
+
+# Add project root and this folder to sys.path to find utils and the intent parser
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from utils.log_utils import log_message
+from time_off_intents import parse_simple_intent, format_balance_answer, format_request_answer
+
+
+class TimeOffIntentsTest:
+    """Test class for the timeoff fast-path intent parser"""
+
+    def test_balance_intents(self):
+        """Plain balance questions should take the fast path"""
+        for prompt in ["What is my time off balance?",
+                       "What is my vacation balance?",
+                       "what's my timeoff balance now?",
+                       "What is vacation balance now?",
+                       "  Check my remaining PTO balance  ",
+                       "How many vacation days do I have left?"]:
+            assert parse_simple_intent(prompt) == {"intent": "balance"}, f"Expected a balance intent for {prompt!r}"
+        log_message("Test", "✓ Balance intents recognized")
+
+    def test_request_intents(self):
+        """Well-formed requests should be parsed into tool arguments"""
+        assert parse_simple_intent("File a time off request for 5 days starting from 2025-05-05") == \
+            {"intent": "request_timeoff", "start_date": "2025-05-05", "total_days": 5}
+        assert parse_simple_intent("book vacation for 1 day starting on 2025-12-24.") == \
+            {"intent": "request_timeoff", "start_date": "2025-12-24", "total_days": 1}
+        assert parse_simple_intent("Create a timeoff request for 3 days from 2025-06-30") == \
+            {"intent": "request_timeoff", "start_date": "2025-06-30", "total_days": 3}
+        log_message("Test", "✓ Request intents recognized")
+
+    def test_fallback_to_agent(self):
+        """Anything ambiguous or malformed should go to the agent"""
+        for prompt in ["Create a timeoff request for 5 days from 30-June-2025",
+                       "File a time off request for 5 days starting from 2025-02-30",
+                       "File a time off request for 0 days starting from 2025-05-05",
+                       "What is Bob's time off balance?",
+                       "What is my balance and file 2 days starting 2025-05-05",
+                       "What is the policy on vacation days?",
+                       "Cancel my time off request for 5 days starting from 2025-05-05"]:
+            assert parse_simple_intent(prompt) is None, f"Expected {prompt!r} to fall back to the agent"
+        log_message("Test", "✓ Other prompts fall back to the agent")
+
+    def test_answers(self):
+        """Tool results should be formatted into short answers"""
+        assert format_balance_answer("Alice", "15") == "Alice, you have 15 days of time off remaining."
+        assert format_balance_answer("Alice", "1") == "Alice, you have 1 day of time off remaining."
+        assert format_balance_answer("Nobody", "") == "I couldn't find a time off balance for Nobody."
+        assert "has been filed" in format_request_answer("Alice", "2025-05-05", 5, "Successfully added", False)
+        assert format_request_answer("Alice", "2025-05-05", 50, "not enough balance", True) == \
+            "I couldn't file the time off request for Alice: not enough balance"
+        log_message("Test", "✓ Answers formatted")
+
+
+if __name__ == "__main__":
+    # Run the tests
+    test_suite = TimeOffIntentsTest()
+    test_suite.test_balance_intents()
+    test_suite.test_request_intents()
+    test_suite.test_fallback_to_agent()
+    test_suite.test_answers()
@@ -1,47 +1,125 @@
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import argparse
 import sys
 import os
 
 # Add the current directory to sys.path to allow imports when running as a module
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from time_off_datastore import TimeOffDatastore
+from time_off_async_datastore import AsyncTimeOffDatastore
 from fastmcp import FastMCP
 
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.metrics import metrics_response
+
 #-----------------------------------------------------------------------
-#Setup the MCP Server
+# Initialize datastore
 #-----------------------------------------------------------------------
 load_dotenv()
-mcp = FastMCP("time-off-mcp-server")
+# Set TIMEOFF_DB_PATH to serve a file database, e.g. one loaded with time_off_bulk_import,
+# and TIMEOFF_DB_SHARDS to spread employees over that many SQLite files.
+# Queries run on a dedicated DB executor so the HTTP event loop never waits on disk I/O.
+# With several worker processes, each one opens the same database files and
+# drops its cached balances whenever another worker has committed.
+workers = int(os.getenv("TIMEOFF_MCP_WORKERS", "1"))
+timeoff_db = None
+
+
+@asynccontextmanager
+async def open_timeoff_db(server):
+    """Opens the datastore as the app starts, and closes it on shutdown.
+
+    Opening it here rather than on import means only the app that serves
+    requests opens it: uvicorn workers also import this module as
+    __mp_main__, and hr_agents_host imports it to build the app.
+    """
+    global timeoff_db
+    timeoff_db = AsyncTimeOffDatastore(os.getenv("TIMEOFF_DB_PATH", ":memory:"),
+                                       shards=int(os.getenv("TIMEOFF_DB_SHARDS", "1")),
+                                       shared_writers=workers > 1)
+    try:
+        yield {}
+    finally:
+        timeoff_db.close()
 
 #-----------------------------------------------------------------------
-# Initialize datastore
+#Setup the MCP Server
 #-----------------------------------------------------------------------
-timeoff_db = TimeOffDatastore()
+mcp = FastMCP("time-off-mcp-server", lifespan=open_timeoff_db)
 
 #-----------------------------------------------------------------------
 # Define MCP Tools
 #-----------------------------------------------------------------------
 # Tool to get timeoff balance for an employee
 @mcp.tool()
-def get_timeoff_balance(employee_name: str):
+async def get_timeoff_balance(employee_name: str):
     """Get the timeoff balance for the employee, given their name."""
     print(f"Getting timeoff balance for employee: {employee_name}")
-    timeoff_balance = timeoff_db.get_timeoff_balance(employee_name)
+    timeoff_balance = await timeoff_db.get_timeoff_balance(employee_name)
     print(f"Timeoff balance for {employee_name}: {timeoff_balance}")
     return timeoff_balance
 
 
+# Tool to get timeoff balances for a group of employees, e.g. a manager's team, in one call
+@mcp.tool()
+async def get_timeoff_balances(employee_names: list[str]):
+    """Get the timeoff balances for several employees at once, given their names.
+    Returns a mapping of employee name to balance (null for unknown employees)."""
+    print(f"Getting timeoff balances for employees: {employee_names}")
+    timeoff_balances = await timeoff_db.get_timeoff_balances(employee_names)
+    print(f"Timeoff balances: {timeoff_balances}")
+    return timeoff_balances
+
+
 # Tool to request timeoff for an employee
 @mcp.tool()
-def request_timeoff(employee_name: str, start_date: str, total_days: int):
-    """Request timeoff for an employee by employee name with start date and total days including start date."""
+async def request_timeoff(employee_name: str, start_date: str, total_days: int, idempotency_key: str | None = None):
+    """Request timeoff for an employee by employee name with start date and total days including start date.
+    Retrying with the same idempotency_key returns the original result instead of booking twice."""
     print(f"Requesting timeoff for {employee_name} from {start_date} for {total_days} days")
-    message = timeoff_db.add_timeoff_request(employee_name, start_date, total_days)
+    message = await timeoff_db.add_timeoff_request(employee_name, start_date, total_days, idempotency_key)
     print(f"Timeoff request result for employee {employee_name}: {message}")
     return message
 
 
+# Tool to list past timeoff requests for an employee, one page at a time
+@mcp.tool()
+async def get_timeoff_history(employee_name: str,
+                              from_date: str | None = None,
+                              to_date: str | None = None,
+                              limit: int = 20,
+                              cursor: str | None = None):
+    """Get the timeoff history for the employee, given their name, optionally between from_date and to_date (YYYY-MM-DD).
+    Results are paginated; pass next_cursor from a previous response as cursor to get the next page."""
+    print(f"Getting timeoff history for employee: {employee_name}")
+    history = await timeoff_db.get_timeoff_history(employee_name, from_date, to_date, limit, cursor)
+    print(f"Timeoff history for {employee_name}: {history}")
+    return history
+
+
+# Tool to find who is out of office on a day or during a date range, e.g. for staffing
+@mcp.tool()
+async def get_absences(from_date: str, to_date: str | None = None, include_names: bool = True):
+    """Get who is out on timeoff for each day from from_date to to_date (YYYY-MM-DD, inclusive).
+    Leave to_date empty for a single day. Returns the headcount per day and, unless include_names
+    is false, the names of the employees who are out. Days with nobody out are omitted."""
+    print(f"Getting absences from {from_date} to {to_date or from_date}")
+    absences = await timeoff_db.get_absences(from_date, to_date, include_names)
+    print(f"Absences: {absences}")
+    return absences
+
+
+#-----------------------------------------------------------------------
+# Metrics
+#-----------------------------------------------------------------------
+# Datastore stage latencies of this process, in the Prometheus text format
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request):
+    return metrics_response()
+
+
 #Get prompt for the LLM to use to answer the query
 @mcp.prompt()
 def get_llm_prompt(user: str, prompt: str) -> str:
@@ -65,11 +143,37 @@ def get_llm_prompt(user: str, prompt: str) -> str:
 # print("TEST: New Time off balance for Alice: ", get_timeoff_balance("Alice"))
 
 
+#-----------------------------------------------------------------------
+# Multi-worker app
+#-----------------------------------------------------------------------
+def create_app():
+    """ASGI app factory that uvicorn calls in every worker process."""
+    # MCP sessions live in the memory of the worker that created them, and the
+    # next request may land on another worker, so every request stands alone
+    return mcp.http_app(path="/", transport="streamable-http", stateless_http=True)
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TimeOff MCP server.")
+    parser.add_argument("--workers", type=int, default=workers,
+                        help="Worker processes serving the port (default: $TIMEOFF_MCP_WORKERS or 1)")
+    args = parser.parse_args()
+
+    port = int(os.getenv("TIMEOFF_MCP_PORT", "8000"))
+    log_level = os.getenv("TIMEOFF_MCP_LOG_LEVEL", "debug")
     print("Starting TimeOff MCP Server...")
-    mcp.run(transport="streamable-http",
-                    host="localhost",
-                    port=8000,
-                    path="/",
-                    log_level="debug")
+    if args.workers > 1:
+        if os.getenv("TIMEOFF_DB_PATH", ":memory:") == ":memory:":
+            parser.error("--workers needs TIMEOFF_DB_PATH set to a database file the workers can share")
+        # Worker processes inherit the environment, and read their settings from it
+        os.environ["TIMEOFF_MCP_WORKERS"] = str(args.workers)
+        import uvicorn
+        uvicorn.run("time_off_mcp_server:create_app", factory=True, workers=args.workers,
+                    host="localhost", port=port, log_level=log_level)
+    else:
+        mcp.run(transport="streamable-http",
+                        host="localhost",
+                        port=port,
+                        path="/",
+                        log_level=log_level)
     print("TimeOff MCP Server started successfully!")
@@ -0,0 +1,243 @@
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to sys.path to allow imports when running as a module
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from time_off_datastore import TimeOffDatastore, IMPORT_BATCH_SIZE, SEED_EMPLOYEES, import_stats
+
+
+# Rows are handed to the shard import threads in chunks to keep queue overhead low
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_QUEUE_CHUNKS = 8
+_END_OF_ROWS = object()
+
+
+def shard_paths(db_path, shard_count):
+    """timeoff.db -> timeoff.shard0.db, timeoff.shard1.db, ... (in-memory stays in-memory)."""
+    if db_path == ":memory:":
+        return [":memory:"] * shard_count
+    base, extension = os.path.splitext(db_path)
+    return [f"{base}.shard{i}{extension or '.db'}" for i in range(shard_count)]
+
+
+class _ShardFeed:
+    """Bounded hand-off of row chunks from the router to one shard's import thread."""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=IMPORT_QUEUE_CHUNKS)
+        self.finished = False
+
+    def rows(self):
+        while True:
+            chunk = self.queue.get()
+            if chunk is _END_OF_ROWS:
+                self.finished = True
+                return
+            yield from chunk
+
+    def drain(self):
+        # Keeps the router from blocking on a shard whose import failed
+        while not self.finished:
+            if self.queue.get() is _END_OF_ROWS:
+                self.finished = True
+
+
+class ShardedTimeOffDatastore:
+    """Spreads employees over shard_count SQLite files by a stable hash of their name.
+
+    Each shard is a TimeOffDatastore with its own connection and lock, so
+    writes for employees on different shards don't wait on one database
+    lock. An employee's balance, history and absences all live on its shard.
+    Reads that span employees (batch balances, absences) are scattered to
+    every shard in parallel and gathered into one result.
+    """
+
+    def __init__(self, db_path=":memory:", shard_count=4, **datastore_kwargs):
+        if shard_count < 1:
+            raise ValueError("shard_count must be at least 1")
+        self.shards = [
+            TimeOffDatastore(path, seed=False, check_same_thread=False, **datastore_kwargs)
+            for path in shard_paths(db_path, shard_count)
+        ]
+        self.locks = [threading.Lock() for _ in self.shards]
+        self._executor = ThreadPoolExecutor(max_workers=shard_count, thread_name_prefix="timeoff-shard")
+        # One bulk import at a time, see _bulk_import
+        self._import_lock = threading.Lock()
+        self.seed_data()
+
+
+    def shard_index(self, employee_name):
+        # crc32 rather than hash(), which is salted per process
+        return zlib.crc32(employee_name.encode("utf-8")) % len(self.shards)
+
+
+    def _on_shard(self, index, method, *args, **kwargs):
+        with self.locks[index]:
+            return getattr(self.shards[index], method)(*args, **kwargs)
+
+
+    def _on_employee_shard(self, employee_name, method, *args, **kwargs):
+        return self._on_shard(self.shard_index(employee_name), method, employee_name, *args, **kwargs)
+
+
+    def _scatter(self, method, args_by_shard):
+        """Runs method on the given shards in parallel; returns results in shard order."""
+        futures = [
+            self._executor.submit(self._on_shard, index, method, *args)
+            for index, args in args_by_shard.items()
+        ]
+        return [future.result() for future in futures]
+
+
+    def seed_data(self, employees=SEED_EMPLOYEES):
+        for employee in employees:
+            self._on_shard(self.shard_index(employee[0]), "seed_data", [employee])
+
+
+    def get_timeoff_balance(self, employee_name):
+        return self._on_employee_shard(employee_name, "get_timeoff_balance")
+
+
+    def get_timeoff_balances(self, employee_names):
+        names_by_shard = {}
+        for employee_name in dict.fromkeys(employee_names):
+            names_by_shard.setdefault(self.shard_index(employee_name), []).append(employee_name)
+
+        balances = {}
+        for shard_balances in self._scatter("get_timeoff_balances",
+                                            {index: (names,) for index, names in names_by_shard.items()}):
+            balances.update(shard_balances)
+        return {employee_name: balances[employee_name] for employee_name in employee_names}
+
+
+    def add_timeoff_request(self, employee_name, start_day, total_days, idempotency_key=None):
+        # Idempotency keys are unique per shard, which covers retries: they
+        # carry the same employee, so they land on the same shard
+        return self._on_employee_shard(employee_name, "add_timeoff_request", start_day, total_days, idempotency_key)
+
+
+    def get_timeoff_history(self, employee_name, from_day=None, to_day=None, limit=20, cursor=None):
+        return self._on_employee_shard(employee_name, "get_timeoff_history", from_day, to_day, limit, cursor)
+
+
+    def get_absences(self, from_day, to_day=None, include_names=True):
+        all_shards = {index: (from_day, to_day, include_names) for index in range(len(self.shards))}
+        shard_results = self._scatter("get_absences", all_shards)
+
+        days = {}
+        for shard_result in shard_results:
+            for day, absence in shard_result["days"].items():
+                merged = days.setdefault(day, {"headcount": 0, "employees": []} if include_names else {"headcount": 0})
+                merged["headcount"] += absence["headcount"]
+                if include_names:
+                    merged["employees"].extend(absence["employees"])
+        for absence in days.values():
+            if include_names:
+                absence["employees"].sort()
+
+        return {
+            "from_day": shard_results[0]["from_day"],
+            "to_day": shard_results[0]["to_day"],
+            "days": dict(sorted(days.items())),
+        }
+
+
+    def bulk_import_employees(self, rows, batch_size=IMPORT_BATCH_SIZE):
+        return self._bulk_import("bulk_import_employees", "name", rows, batch_size)
+
+
+    def bulk_import_timeoff_history(self, rows, batch_size=IMPORT_BATCH_SIZE):
+        return self._bulk_import("bulk_import_timeoff_history", "employee_name", rows, batch_size)
+
+
+    def _bulk_import(self, method, name_field, rows, batch_size):
+        """Streams rows to every shard's own bulk import, which run in parallel.
+
+        The router blocks on a full feed until that shard's import drains it,
+        so every feed needs a running import thread of its own: they get a
+        pool of their own, rather than waiting behind other work on the
+        shared executor. Imports are serialized, since each holds its shards'
+        locks until its rows end, and two taking the locks of different
+        shards would each wait on the other for good.
+        """
+        with self._import_lock, ThreadPoolExecutor(max_workers=len(self.shards),
+                                                   thread_name_prefix="timeoff-import") as executor:
+            return self._bulk_import_with(executor, method, name_field, rows, batch_size)
+
+
+    def _bulk_import_with(self, executor, method, name_field, rows, batch_size):
+        started = time.perf_counter()
+        feeds = [_ShardFeed() for _ in self.shards]
+        futures = [
+            executor.submit(self._import_from_feed, index, method, feed, batch_size)
+            for index, feed in enumerate(feeds)
+        ]
+
+        unroutable = 0
+        chunks = [[] for _ in self.shards]
+        try:
+            for row in rows:
+                try:
+                    index = self.shard_index(row[name_field].strip())
+                except (KeyError, AttributeError, TypeError):
+                    unroutable += 1
+                    continue
+                chunks[index].append(row)
+                if len(chunks[index]) >= IMPORT_CHUNK_SIZE:
+                    self._put_chunk(feeds[index], chunks[index])
+                    chunks[index] = []
+        finally:
+            for index, feed in enumerate(feeds):
+                if chunks[index]:
+                    self._put_chunk(feed, chunks[index])
+                self._put_chunk(feed, _END_OF_ROWS)
+
+        shard_stats = [future.result() for future in futures]
+        return import_stats(
+            sum(stats["rows_imported"] for stats in shard_stats),
+            unroutable + sum(stats["rows_skipped"] for stats in shard_stats),
+            time.perf_counter() - started,
+        )
+
+
+    def _put_chunk(self, feed, chunk):
+        if not feed.finished:
+            feed.queue.put(chunk)
+
+
+    def _import_from_feed(self, index, method, feed, batch_size):
+        try:
+            return self._on_shard(index, method, feed.rows(), batch_size)
+        finally:
+            feed.drain()
+
+
+    def balance_cache_stats(self):
+        shard_stats = [self._on_shard(index, "balance_cache_stats") for index in range(len(self.shards))]
+        stats = {
+            key: sum(shard[key] for shard in shard_stats)
+            for key in ("size", "max_size", "hits", "misses", "evictions")
+        }
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+    def check_balance_cache(self):
+        return [
+            employee_name
+            for index in range(len(self.shards))
+            for employee_name in self._on_shard(index, "check_balance_cache")
+        ]
+
+
+    def close(self):
+        self._executor.shutdown()
+        for index in range(len(self.shards)):
+            self._on_shard(index, "close")
@@ -0,0 +1,46 @@
+import os
+import sys
+from typing import Iterable, Protocol
+
+# Add the current directory to sys.path to allow imports when running as a module
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from time_off_datastore import TimeOffDatastore, IMPORT_BATCH_SIZE
+from time_off_sharded_datastore import ShardedTimeOffDatastore
+
+
+class TimeOffStorage(Protocol):
+    """What the timeoff MCP server needs from a storage backend.
+
+    TimeOffDatastore (one SQLite file) and ShardedTimeOffDatastore (employees
+    spread over several files) both implement it.
+    """
+
+    def get_timeoff_balance(self, employee_name: str) -> int | None: ...
+
+    def get_timeoff_balances(self, employee_names: list[str]) -> dict[str, int | None]: ...
+
+    def add_timeoff_request(self, employee_name: str, start_day: str, total_days: int,
+                            idempotency_key: str | None = None) -> str: ...
+
+    def get_timeoff_history(self, employee_name: str, from_day: str | None = None, to_day: str | None = None,
+                            limit: int = 20, cursor: str | None = None) -> dict | None: ...
+
+    def get_absences(self, from_day: str, to_day: str | None = None, include_names: bool = True) -> dict: ...
+
+    def bulk_import_employees(self, rows: Iterable[dict], batch_size: int = IMPORT_BATCH_SIZE) -> dict: ...
+
+    def bulk_import_timeoff_history(self, rows: Iterable[dict], batch_size: int = IMPORT_BATCH_SIZE) -> dict: ...
+
+    def balance_cache_stats(self) -> dict: ...
+
+    def check_balance_cache(self) -> list[str]: ...
+
+    def close(self) -> None: ...
+
+
+def open_timeoff_storage(db_path=":memory:", shards=1, **datastore_kwargs) -> TimeOffStorage:
+    """Opens a single-file datastore, or a sharded one when shards > 1."""
+    if shards > 1:
+        return ShardedTimeOffDatastore(db_path, shards, **datastore_kwargs)
+    return TimeOffDatastore(db_path, **datastore_kwargs)
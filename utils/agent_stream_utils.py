@@ -0,0 +1,59 @@
+import time
+from typing import Any, AsyncIterator
+
+from utils.metrics import observe_stage, record_llm_tokens
+
+
+# Events yielded while an agent runs:
+#   ("token", text)      - a piece of model output, as it is generated
+#   ("tool", tool_name)  - the agent started calling a tool
+#   ("final", text)      - the complete answer, always the last event
+AgentEvent = tuple[str, str]
+
+
+async def stream_agent_events(agent, agent_input: dict, config: dict | None = None) -> AsyncIterator[AgentEvent]:
+    """Runs a LangGraph agent through astream_events and yields its tokens, tool calls and final answer.
+
+    Every model call and tool call is timed into the stage metrics, and the
+    tokens the model reports are counted.
+    """
+    final_answer = ""
+    # run id -> start time of the model and tool calls in progress
+    started = {}
+    async for event in agent.astream_events(agent_input, config=config, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            text = _chunk_text(event["data"]["chunk"].content)
+            if text:
+                yield "token", text
+        elif kind in ("on_chat_model_start", "on_tool_start"):
+            started[event["run_id"]] = time.perf_counter()
+            if kind == "on_tool_start":
+                yield "tool", event["name"]
+        elif kind == "on_chat_model_end":
+            _observe_run(started, event, "llm_generation")
+            usage = getattr(event["data"].get("output"), "usage_metadata", None)
+            if usage:
+                model_name = event.get("metadata", {}).get("ls_model_name", "unknown")
+                record_llm_tokens(model_name, usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+        elif kind in ("on_tool_end", "on_tool_error"):
+            _observe_run(started, event, f"tool.{event['name']}")
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            # The root run ends last; its state holds the agent's answer
+            output = event["data"].get("output")
+            if isinstance(output, dict) and output.get("messages"):
+                final_answer = output["messages"][-1].content
+    yield "final", final_answer
+
+
+def _observe_run(started, event, stage):
+    start = started.pop(event["run_id"], None)
+    if start is not None:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def _chunk_text(content: Any) -> str:
+    # Chunk content is a string, or a list of content blocks for some models
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
@@ -0,0 +1,96 @@
+import asyncio
+import re
+import time
+import uuid
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+# Prompts the router sends to each agent, by the words that give them away
+TIMEOFF_PATTERN = re.compile(r"balance|time ?off|days? (starting|from)", re.IGNORECASE)
+POLICY_PATTERN = re.compile(r"polic|remote|conflict|leave|benefit|vacation|conduct", re.IGNORECASE)
+REQUEST_PATTERN = re.compile(r"(\d+)\s+days?\b.*?(\d{4}-\d{2}-\d{2})", re.IGNORECASE)
+# The timeoff agent's MCP prompt ends with "... in terms of the user <name>"
+USER_PATTERN = re.compile(r"in terms of the user\s+(\w+)", re.IGNORECASE)
+
+
+#---------------------------------------------------------------------
+# Scripted Chat Model
+#---------------------------------------------------------------------
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic stand-in for ChatOllama, for load tests without a GPU.
+
+    It answers the way the real model is expected to, without generating
+    anything: the router gets POLICY, TIMEOFF or UNSUPPORTED from keywords,
+    an agent with tools gets one tool call picked from its prompt, and once
+    the tool has answered, a final answer quoting the tool result. Every
+    call waits latency_seconds, to stand in for generation time.
+    """
+
+    model: str = "scripted"
+    latency_seconds: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        return self._result(messages, kwargs.get("tools") or [])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        return self._result(messages, kwargs.get("tools") or [])
+
+    def _result(self, messages, tools):
+        message = self._next_message(messages, [tool["function"]["name"] for tool in tools])
+        # Word counts, so token metrics move the way they would with a real model
+        input_tokens = sum(len(str(m.content).split()) for m in messages)
+        output_tokens = len(str(message.content).split()) + len(message.tool_calls)
+        message.usage_metadata = {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                                  "total_tokens": input_tokens + output_tokens}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _next_message(self, messages, tool_names):
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"According to {last.name}: {str(last.content)[:500]}")
+
+        prompt = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        if not tool_names:
+            return AIMessage(content=_route(prompt))
+
+        name, args = _tool_call(prompt, tool_names)
+        if name is None:
+            return AIMessage(content="Sorry, I have no tool for that.")
+        return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex}"}])
+
+
+def _route(prompt):
+    if TIMEOFF_PATTERN.search(prompt):
+        return "TIMEOFF"
+    if POLICY_PATTERN.search(prompt):
+        return "POLICY"
+    return "UNSUPPORTED"
+
+
+def _tool_call(prompt, tool_names):
+    if "query_policies" in tool_names:
+        return "query_policies", {"query": prompt}
+
+    user = USER_PATTERN.search(prompt)
+    employee_name = user.group(1) if user else "Alice"
+    request = REQUEST_PATTERN.search(prompt)
+    if request and "request_timeoff" in tool_names:
+        return "request_timeoff", {"employee_name": employee_name, "start_date": request.group(2),
+                                   "total_days": int(request.group(1))}
+    if "get_timeoff_balance" in tool_names:
+        return "get_timeoff_balance", {"employee_name": employee_name}
+    return None, None
@@ -0,0 +1,163 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Histogram bucket bounds in seconds, from a SQLite lookup up to a slow LLM generation
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(label_value):
+    return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+#---------------------------------------------------------------------
+# Metric Types
+#---------------------------------------------------------------------
+class _Metric:
+    """A named metric with one value per combination of label values."""
+
+    kind = None
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        # Datastore calls run on worker threads, so updates take a lock
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.label_names, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{self._labels(key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names, buckets=STAGE_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            # Per bucket counts, plus one for values above the last bound; sum; count
+            state = self.values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{self.name}_bucket{self._labels(key, [('le', repr(float(bound)))])} {cumulative}")
+        lines.append(f"{self.name}_bucket{self._labels(key, [('le', '+Inf')])} {count}")
+        lines.append(f"{self.name}_sum{self._labels(key)} {total}")
+        lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+#---------------------------------------------------------------------
+# Registry
+#---------------------------------------------------------------------
+class MetricsRegistry:
+    """The metrics of one process, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "hr_agents_stage_duration_seconds", "Time spent in each stage of answering a request.", ["stage"]))
+STAGE_IN_FLIGHT = REGISTRY.register(Gauge(
+    "hr_agents_stage_in_flight", "Calls currently inside each stage.", ["stage"]))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "hr_agents_llm_tokens_total", "Tokens sent to and generated by the LLM.", ["model", "direction"]))
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Times the body into the stage histogram, and counts it in flight while it runs."""
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+
+
+def observe_stage(stage: str, seconds: float):
+    """Records a stage timed elsewhere, e.g. from the start and end events of a run."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def record_llm_tokens(model: str, input_tokens: int, output_tokens: int):
+    LLM_TOKENS.inc(input_tokens, model=model, direction="input")
+    LLM_TOKENS.inc(output_tokens, model=model, direction="output")
+
+
+def metrics_response():
+    """The registry as a Starlette response, for GET /metrics handlers."""
+    from starlette.responses import PlainTextResponse
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def metrics_route():
+    """Starlette route serving GET /metrics in the Prometheus text format."""
+    from starlette.routing import Route
+
+    async def metrics(request):
+        return metrics_response()
+
+    return Route("/metrics", metrics, methods=["GET"])
@@ -0,0 +1,62 @@
+import sys
+import os
+import threading
+
+
+# Add project root to sys.path to find utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.log_utils import log_message
+from utils.metrics import MetricsRegistry, Histogram, Gauge, Counter
+
+
+class MetricsTest:
+    """Test class for the Prometheus metrics"""
+
+    def test_render(self):
+        """Histograms should render cumulative buckets, and labels be escaped"""
+        registry = MetricsRegistry()
+        stage_seconds = registry.register(Histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1)))
+        in_flight = registry.register(Gauge("in_flight", "In flight.", ["stage"]))
+        tokens = registry.register(Counter("tokens_total", "Tokens.", ["model"]))
+
+        for seconds in (0.05, 0.1, 0.5, 2):
+            stage_seconds.observe(seconds, stage="llm")
+        in_flight.inc(stage="llm")
+        in_flight.dec(stage="llm")
+        tokens.inc(3, model='say "hi"')
+
+        text = registry.render()
+        log_message("Test", f"Rendered metrics:\n{text}")
+        for line in ['# TYPE stage_seconds histogram',
+                     'stage_seconds_bucket{stage="llm",le="0.1"} 2',
+                     'stage_seconds_bucket{stage="llm",le="1.0"} 3',
+                     'stage_seconds_bucket{stage="llm",le="+Inf"} 4',
+                     'stage_seconds_sum{stage="llm"} 2.65',
+                     'stage_seconds_count{stage="llm"} 4',
+                     'in_flight{stage="llm"} 0',
+                     'tokens_total{model="say \\"hi\\""} 3']:
+            assert line in text.splitlines(), f"Expected {line!r} in the metrics"
+        log_message("Test", "✓ Render assertions passed!")
+
+    def test_threads(self):
+        """Updates from many threads should not be lost"""
+        counter = Counter("calls_total", "Calls.", ["stage"])
+
+        def count():
+            for _ in range(10_000):
+                counter.inc(stage="sqlite")
+
+        threads = [threading.Thread(target=count) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert counter.values[("sqlite",)] == 40_000, counter.values
+        log_message("Test", "✓ Thread assertions passed!")
+
+
+if __name__ == "__main__":
+    # Run the tests
+    test_suite = MetricsTest()
+    test_suite.test_render()
+    test_suite.test_threads()
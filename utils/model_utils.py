@@ -1,17 +1,79 @@
-async def test_model_connection(model):
+import asyncio
+import os
+import threading
+
+from langchain_ollama import ChatOllama
+
+
+# How long Ollama keeps a model loaded after each request, e.g. "30m", or -1 for good.
+# Ollama's own default of 5 minutes makes the next request after a short lull reload the model.
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Set to hand out a scripted fake instead of Ollama models, e.g. for load tests on machines without a GPU;
+# HR_AGENTS_FAKE_LLM_LATENCY_MS is how long each of its calls takes
+FAKE_LLM = os.getenv("HR_AGENTS_FAKE_LLM", "") not in ("", "0")
+FAKE_LLM_LATENCY_MS = float(os.getenv("HR_AGENTS_FAKE_LLM_LATENCY_MS", "0"))
+
+# (model name, temperature, keep alive) -> the chat model shared by everyone asking for it
+_chat_models: dict[tuple, object] = {}
+# embeddings model name -> the embeddings shared by everyone asking for it
+_embeddings: dict[str, object] = {}
+# Embeddings are loaded in worker threads, see get_embeddings
+_embeddings_lock = threading.Lock()
+
+
+def get_chat_model(model_name: str = "llama3.1", temperature: float | None = None,
+                   keep_alive: str | int = KEEP_ALIVE):
+    """Returns the process-wide ChatOllama for these settings, creating it on first use.
+
+    Every ChatOllama holds its own HTTP client to Ollama, so one is created
+    per model name and keep alive, and other temperatures are copies of it
+    that share its client: all the agents in a process share a connection
+    pool, whatever temperature each of them runs at. With HR_AGENTS_FAKE_LLM
+    set, it's a ScriptedChatModel instead.
+    """
+    key = (model_name, temperature, keep_alive)
+    if key not in _chat_models:
+        base_key = (model_name, None, keep_alive)
+        if base_key not in _chat_models:
+            if FAKE_LLM:
+                from utils.fake_chat_model import ScriptedChatModel
+                _chat_models[base_key] = ScriptedChatModel(latency_seconds=FAKE_LLM_LATENCY_MS / 1000)
+            else:
+                _chat_models[base_key] = ChatOllama(model=model_name, keep_alive=keep_alive)
+        if key != base_key:
+            # A shallow copy keeps the HTTP clients of the base model
+            _chat_models[key] = _chat_models[base_key].model_copy(update={"temperature": temperature})
+    return _chat_models[key]
+
+
+def get_embeddings(model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    """Returns the process-wide embeddings model, loading it on first use.
+
+    Safe to call from several threads at once; the model is loaded only once.
+    """
+    with _embeddings_lock:
+        if model_name not in _embeddings:
+            # Imported here, since it pulls in sentence-transformers and torch
+            from langchain_huggingface import HuggingFaceEmbeddings
+            _embeddings[model_name] = HuggingFaceEmbeddings(model_name=model_name)
+        return _embeddings[model_name]
+
+
+async def warm_up_model(model) -> bool:
+    """Makes Ollama load the model now, so the first user request doesn't pay for it."""
     try:
-        # Test the model with a simple prompt
-        response = await model.ainvoke("Say hello in a creative way!")
-        print("\nModel connection test successful!")
-        print("Response:", response)
+        # A one-token generation loads the model and starts its keep-alive
+        await model.ainvoke("Hi", options={"num_predict": 1})
         return True
     except Exception as e:
         print("\nError connecting to model:", str(e))
         print("\nPlease ensure the model is available and properly configured.")
         print("You can start Ollama with: ollama serve")
-        print("And download a model with: ollama pull llama2")
+        print(f"And download a model with: ollama pull {model.model}")
         return False
 
 
-
-    
\ No newline at end of file
+def start_warm_up(model) -> asyncio.Task:
+    """Warms the model in the background, for server lifespans that shouldn't wait on Ollama."""
+    return asyncio.create_task(warm_up_model(model))